@@ -3,19 +3,101 @@ Encryption and decryption utilities
 """
 
 from cryptography.fernet import Fernet
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+from cryptography.hazmat.primitives.kdf.hkdf import HKDFExpand
 import base64
 import os
 
+from core.kdf import derive_master_secret, DEFAULT_ITERATIONS
+
+def expand_key(master_secret, purpose, length=32):
+    """Derive an independent sub key from the master secret (HKDF-Expand)"""
+    hkdf = HKDFExpand(
+        algorithm=hashes.SHA256(),
+        length=length,
+        info=f"savepassword:{purpose}".encode(),
+    )
+    return hkdf.derive(master_secret)
+
+# Wrapped data keys: nonce (12) | encrypted key | tag (16)
+KEY_WRAP_AAD = b"savepassword:data-key"
+
+def wrap_key(key_encryption_key, data_key):
+    """Encrypt the vault data key with the password-derived key"""
+    aead = AESGCM(expand_key(key_encryption_key, "key-wrap"))
+    nonce = os.urandom(12)
+    return nonce + aead.encrypt(nonce, data_key, KEY_WRAP_AAD)
+
+def unwrap_key(key_encryption_key, wrapped):
+    """Decrypt a data key produced by wrap_key"""
+    aead = AESGCM(expand_key(key_encryption_key, "key-wrap"))
+    return aead.decrypt(wrapped[:12], wrapped[12:], KEY_WRAP_AAD)
+
+class FernetCipher:
+    """Fernet tokens (AES-128-CBC + HMAC-SHA256, base64 text)"""
+    
+    name = 'fernet'
+    
+    def __init__(self, key):
+        self.fernet = Fernet(base64.urlsafe_b64encode(key))
+    
+    @staticmethod
+    def matches(data):
+        """Fernet tokens start with the base64 encoded version byte 0x80"""
+        return data[:1] == b'g'
+    
+    def encrypt(self, plaintext):
+        return self.fernet.encrypt(plaintext)
+    
+    def decrypt(self, data):
+        return self.fernet.decrypt(data)
+
+class AESGCMCipher:
+    """AES-256-GCM stored as raw bytes: prefix | nonce (12) | ciphertext"""
+    
+    name = 'aes-gcm'
+    PREFIX = b'\x02'
+    NONCE_SIZE = 12
+    
+    def __init__(self, key):
+        self.aead = AESGCM(expand_key(key, "field:aes-gcm"))
+    
+    @classmethod
+    def matches(cls, data):
+        return data[:1] == cls.PREFIX
+    
+    def encrypt(self, plaintext):
+        nonce = os.urandom(self.NONCE_SIZE)
+        return self.PREFIX + nonce + self.aead.encrypt(nonce, plaintext, self.PREFIX)
+    
+    def decrypt(self, data):
+        nonce = data[1:1 + self.NONCE_SIZE]
+        return self.aead.decrypt(nonce, data[1 + self.NONCE_SIZE:], self.PREFIX)
+
+# Available field ciphers; new values are written with DEFAULT_CIPHER
+CIPHERS = {cipher.name: cipher for cipher in (FernetCipher, AESGCMCipher)}
+DEFAULT_CIPHER = 'aes-gcm'
+
+class VaultLockedError(RuntimeError):
+    """Raised when values are encrypted or decrypted without a key"""
+
 class CryptoManager:
-    """Manage encryption and decryption"""
+    """Manage encryption and decryption
     
-    def __init__(self):
+    Values are written with one cipher backend (``cipher``) and read with
+    whichever backend produced them, recognised by their first byte.
+    """
+    
+    def __init__(self, cipher=DEFAULT_CIPHER):
+        if cipher not in CIPHERS:
+            raise ValueError(f"Unsupported cipher: {cipher}")
+        self.cipher_name = cipher
         self.key = None
-        self.fernet = None
+        self.ciphers = {}
     
-    def set_key_from_password(self, password, salt=None):
+    def set_key_from_password(self, password, salt=None, iterations=DEFAULT_ITERATIONS):
         """Set encryption key from password using PBKDF2"""
         if salt is None:
             salt = os.urandom(16)
@@ -24,20 +106,79 @@ class CryptoManager:
             algorithm=hashes.SHA256(),
             length=32,
             salt=salt,
-            iterations=100000,
+            iterations=iterations,
         )
-        key = base64.urlsafe_b64encode(kdf.derive(password.encode()))
-        self.fernet = Fernet(key)
+        self.set_key(kdf.derive(password.encode()))
         return salt
     
+    def derive_keys(self, password, kdf_params):
+        """Derive the password verifier and key encryption key from one KDF run
+        
+        The second key wraps the random vault data key (see wrap_key); only
+        vaults created before envelope encryption use it for records.
+        """
+        master_secret = derive_master_secret(password, kdf_params)
+        verifier = expand_key(master_secret, "verifier")
+        encryption_key = expand_key(master_secret, "encryption")
+        return verifier, encryption_key
+    
+    def set_key(self, key):
+        """Set the raw 32-byte vault data key"""
+        self.key = key
+        self.ciphers = {name: cipher(key) for name, cipher in CIPHERS.items()}
+    
+    def clear_key(self):
+        """Forget the current encryption key"""
+        self.key = None
+        self.ciphers = {}
+    
+    def _cipher_for(self, data):
+        """Find the backend that produced a stored value"""
+        for cipher in self.ciphers.values():
+            if cipher.matches(data):
+                return cipher
+        raise ValueError("Unknown ciphertext format")
+    
     def encrypt(self, data):
-        """Encrypt data"""
-        if self.fernet and data:
-            return self.fernet.encrypt(data.encode())
-        return data.encode() if data else b''
+        """Encrypt data (raises VaultLockedError without a key)"""
+        if not data:
+            return b''
+        if not self.ciphers:
+            raise VaultLockedError("Cannot encrypt: the vault is locked")
+        return self.ciphers[self.cipher_name].encrypt(data.encode())
     
     def decrypt(self, encrypted_data):
-        """Decrypt data"""
-        if self.fernet and encrypted_data:
-            return self.fernet.decrypt(encrypted_data).decode()
-        return encrypted_data.decode() if encrypted_data else ''
\ No newline at end of file
+        """Decrypt data (raises VaultLockedError without a key)"""
+        if not encrypted_data:
+            return ''
+        if isinstance(encrypted_data, str):
+            encrypted_data = encrypted_data.encode()
+        if not self.ciphers:
+            raise VaultLockedError("Cannot decrypt: the vault is locked")
+        return self._cipher_for(encrypted_data).decrypt(encrypted_data).decode()
+    
+    def needs_migration(self, encrypted_data):
+        """True when a stored value was not written with the current cipher"""
+        if isinstance(encrypted_data, str):
+            encrypted_data = encrypted_data.encode()
+        if not self.ciphers or not encrypted_data:
+            return False
+        return not self.ciphers[self.cipher_name].matches(encrypted_data)
+    
+    def try_decrypt(self, encrypted_data):
+        """Decrypt one value, returning (plaintext, None) or (None, error)"""
+        try:
+            return self.decrypt(encrypted_data), None
+        except Exception as e:
+            return None, f"{type(e).__name__}: {e}" if str(e) else type(e).__name__
+    
+    def decrypt_many(self, encrypted_items):
+        """Decrypt a batch of values
+        
+        Returns a list of (plaintext, error) tuples in input order; error is
+        None on success and a message when that item could not be decrypted.
+        Raises VaultLockedError without a key rather than failing every item.
+        """
+        if self.key is None:
+            raise VaultLockedError("Cannot decrypt: the vault is locked")
+        return [self.try_decrypt(item) for item in encrypted_items]
\ No newline at end of file
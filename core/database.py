@@ -0,0 +1,116 @@
+"""
+SQLite connection management for SavePassword
+"""
+
+import sqlite3
+import threading
+import queue
+from contextlib import contextmanager
+
+# Pragmas applied once to every new connection
+CONNECTION_PRAGMAS = (
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",
+    "PRAGMA cache_size=-8000",        # ~8 MB page cache
+    "PRAGMA mmap_size=67108864",      # 64 MB memory mapped I/O
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA foreign_keys=ON",
+)
+
+class ConnectionManager:
+    """Keep long-lived, pre-configured SQLite connections
+    
+    The thread that created the manager (normally the Tk main loop) owns a
+    dedicated connection. Other threads borrow connections from a small
+    bounded pool for the duration of a ``connection()`` block.
+    """
+    
+    def __init__(self, db_path, pool_size=4, timeout=30.0):
+        self.db_path = db_path
+        self.pool_size = pool_size
+        self.timeout = timeout
+        self._owner_thread = threading.get_ident()
+        self._main_connection = None
+        self._local = threading.local()
+        self._idle = queue.LifoQueue(maxsize=pool_size)
+        self._slots = threading.BoundedSemaphore(pool_size)
+        self._closed = False
+    
+    def _connect(self):
+        """Open and configure a new connection"""
+        conn = sqlite3.connect(self.db_path, timeout=self.timeout, check_same_thread=False)
+        for pragma in CONNECTION_PRAGMAS:
+            conn.execute(pragma)
+        return conn
+    
+    @contextmanager
+    def connection(self):
+        """Yield a connection for the current thread
+        
+        Raises sqlite3.ProgrammingError after close() until reopen() is
+        called, so work that outlives a lock cannot open new handles.
+        """
+        if self._closed:
+            raise sqlite3.ProgrammingError("Database connections are closed")
+        
+        if threading.get_ident() == self._owner_thread:
+            if self._main_connection is None:
+                self._main_connection = self._connect()
+            yield self._main_connection
+            return
+        
+        # Nested use on a worker thread reuses the borrowed connection
+        borrowed = getattr(self._local, 'connection', None)
+        if borrowed is not None:
+            yield borrowed
+            return
+        
+        self._slots.acquire()
+        try:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                conn = self._connect()
+            self._local.connection = conn
+            try:
+                yield conn
+            finally:
+                self._local.connection = None
+                if conn.in_transaction:
+                    conn.rollback()
+                if self._closed:
+                    conn.close()
+                else:
+                    self._idle.put_nowait(conn)
+        finally:
+            self._slots.release()
+    
+    @contextmanager
+    def transaction(self):
+        """Yield a connection inside a transaction (commit or rollback)"""
+        with self.connection() as conn:
+            with conn:
+                yield conn
+    
+    def reopen(self):
+        """Allow connections again after close() (e.g. when unlocking)"""
+        self._closed = False
+    
+    def close(self):
+        """Close all connections held by this manager
+        
+        Connections currently borrowed by worker threads are closed as soon
+        as they are handed back.
+        """
+        self._closed = True
+        
+        main_connection, self._main_connection = self._main_connection, None
+        if main_connection is not None:
+            main_connection.close()
+        
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            conn.close()
\ No newline at end of file
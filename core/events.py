@@ -0,0 +1,70 @@
+"""
+Change notifications from PasswordManager to the GUI
+"""
+
+import threading
+
+# Event kinds
+PASSWORD_INSERTED = 'password_inserted'
+PASSWORD_UPDATED = 'password_updated'
+PASSWORD_DELETED = 'password_deleted'
+PASSWORDS_RELOADED = 'passwords_reloaded'    # many rows changed at once (imports)
+CATEGORY_ADDED = 'category_added'
+
+class ChangeEvent:
+    """A committed change to the vault
+    
+    ``record`` is the new PasswordRecord (inserted/updated passwords) or
+    the category dict (added categories). ``category_id`` is the category
+    the password is in now, or was in for deletions; updates also carry
+    the ``previous_category_id``.
+    """
+    
+    __slots__ = ('kind', 'id', 'record', 'category_id', 'previous_category_id')
+    
+    def __init__(self, kind, id=None, record=None, category_id=None, previous_category_id=None):
+        self.kind = kind
+        self.id = id
+        self.record = record
+        self.category_id = category_id
+        self.previous_category_id = previous_category_id
+    
+    def __repr__(self):
+        return f"ChangeEvent({self.kind!r}, id={self.id!r})"
+
+class ChangeBus:
+    """Deliver change events to subscribed listeners
+    
+    Listeners run on the thread that made the change, after its commit;
+    GUI listeners have to pass events on to the Tk thread themselves.
+    """
+    
+    def __init__(self):
+        self._listeners = []
+        self._lock = threading.Lock()
+    
+    @property
+    def has_listeners(self):
+        """True when anyone is subscribed (events are only built then)"""
+        return bool(self._listeners)
+    
+    def subscribe(self, listener):
+        """Call listener(event) for every change"""
+        with self._lock:
+            self._listeners.append(listener)
+    
+    def unsubscribe(self, listener):
+        """Stop calling a listener"""
+        with self._lock:
+            if listener in self._listeners:
+                self._listeners.remove(listener)
+    
+    def emit(self, event):
+        """Send an event to all listeners"""
+        with self._lock:
+            listeners = list(self._listeners)
+        for listener in listeners:
+            try:
+                listener(event)
+            except Exception as e:
+                print(f"Error in change listener: {e}")
\ No newline at end of file
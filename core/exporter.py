@@ -0,0 +1,256 @@
+"""
+Streaming vault export (encrypted container, CSV and JSON)
+
+Encrypted exports use a chunked AES-256-GCM container:
+    
+    magic (8 bytes) | header length (4) | header JSON
+    frame*: ciphertext length (4) | final flag (1) | nonce (12) | ciphertext
+
+The header holds the KDF parameters for the export password. Each frame
+encrypts at most ``frame_size`` bytes of JSON lines with a fresh nonce.
+The additional data binds every frame to the header hash, its index and
+whether it is the final frame, so reordered, dropped or truncated frames
+fail to decrypt.
+"""
+
+import csv
+import hashlib
+import io
+import itertools
+import json
+import os
+import secrets
+import struct
+
+from cryptography.hazmat.primitives.ciphers.aead import AESGCM
+
+from core.crypto import expand_key
+from core.kdf import derive_master_secret, new_kdf_params
+
+MAGIC = b'SPEXPORT'
+CONTAINER_VERSION = 1
+FRAME_SIZE = 64 * 1024
+NONCE_SIZE = 12
+
+# Rows read and decrypted together
+EXPORT_BATCH_SIZE = 10000
+
+EXPORT_FORMATS = ('encrypted', 'csv', 'json')
+EXPORT_FIELDS = ('title', 'username', 'password', 'website', 'notes', 'category')
+
+def iter_export_records(password_manager, errors=None, batch_size=EXPORT_BATCH_SIZE):
+    """Yield export rows with decrypted passwords, one batch at a time
+    
+    Each batch is decrypted with PasswordManager.decrypt_records. Rows
+    that cannot be decrypted are skipped and their ids appended to
+    ``errors`` when a list is given. Query errors are raised.
+    """
+    records = password_manager.iter_passwords(batch_size=batch_size)
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if not batch:
+            return
+        
+        for record, (password, error) in zip(batch, password_manager.decrypt_records(batch)):
+            if error is not None:
+                if errors is not None:
+                    errors.append(record['id'])
+                continue
+            row = {field: record.get(field) or '' for field in EXPORT_FIELDS if field != 'password'}
+            row['password'] = password
+            yield row
+
+def _frame_aad(header_hash, index, final):
+    """Additional authenticated data for one frame"""
+    return header_hash + struct.pack('>Q?', index, final)
+
+class FrameWriter:
+    """Buffer plaintext and write it as encrypted frames"""
+    
+    def __init__(self, f, password, kdf_params, frame_size=FRAME_SIZE):
+        self.f = f
+        self.frame_size = frame_size
+        self.buffer = bytearray()
+        self.index = 0
+        
+        header = json.dumps({
+            'version': CONTAINER_VERSION,
+            'cipher': 'aes-256-gcm',
+            'frame_size': frame_size,
+            'content': 'jsonl',
+            'kdf': kdf_params
+        }).encode()
+        self.header_hash = hashlib.sha256(header).digest()
+        self.aead = AESGCM(expand_key(derive_master_secret(password, kdf_params), "export"))
+        
+        f.write(MAGIC + struct.pack('>I', len(header)) + header)
+    
+    def write(self, data):
+        """Add plaintext; full frames are encrypted and written"""
+        self.buffer += data
+        while len(self.buffer) > self.frame_size:
+            self._write_frame(bytes(self.buffer[:self.frame_size]), final=False)
+            del self.buffer[:self.frame_size]
+    
+    def close(self):
+        """Write the remaining data as the final frame"""
+        self._write_frame(bytes(self.buffer), final=True)
+        self.buffer.clear()
+    
+    def _write_frame(self, plaintext, final):
+        """Encrypt and write one frame"""
+        nonce = secrets.token_bytes(NONCE_SIZE)
+        ciphertext = self.aead.encrypt(nonce, plaintext, _frame_aad(self.header_hash, self.index, final))
+        self.f.write(struct.pack('>I?', len(ciphertext), final) + nonce + ciphertext)
+        self.index += 1
+
+def _read_exact(f, size):
+    """Read exactly size bytes or fail on a truncated file"""
+    data = f.read(size)
+    if len(data) != size:
+        raise ValueError("Export file is truncated")
+    return data
+
+def read_header(f):
+    """Read and return the container header"""
+    if f.read(len(MAGIC)) != MAGIC:
+        raise ValueError("Not a SavePassword export file")
+    header_length = struct.unpack('>I', _read_exact(f, 4))[0]
+    header_bytes = _read_exact(f, header_length)
+    header = json.loads(header_bytes)
+    if header.get('version') != CONTAINER_VERSION:
+        raise ValueError(f"Unsupported export version: {header.get('version')}")
+    return header, header_bytes
+
+def iter_frames(f, password):
+    """Decrypt and yield the plaintext of each frame in order
+    
+    Raises cryptography's InvalidTag when a frame was modified, reordered
+    or the password is wrong, and ValueError when frames are missing.
+    """
+    header, header_bytes = read_header(f)
+    header_hash = hashlib.sha256(header_bytes).digest()
+    aead = AESGCM(expand_key(derive_master_secret(password, header['kdf']), "export"))
+    
+    index = 0
+    while True:
+        frame_header = f.read(5)
+        if not frame_header:
+            raise ValueError("Export file is truncated (final frame missing)")
+        if len(frame_header) != 5:
+            raise ValueError("Export file is truncated")
+        length, final = struct.unpack('>I?', frame_header)
+        nonce = _read_exact(f, NONCE_SIZE)
+        ciphertext = _read_exact(f, length)
+        
+        yield aead.decrypt(nonce, ciphertext, _frame_aad(header_hash, index, final))
+        index += 1
+        if final:
+            if f.read(1):
+                raise ValueError("Unexpected data after the final frame")
+            return
+
+def read_encrypted_export(path, password):
+    """Yield the records stored in an encrypted export"""
+    with open(path, 'rb') as f:
+        pending = b''
+        for plaintext in iter_frames(f, password):
+            lines = (pending + plaintext).split(b'\n')
+            pending = lines.pop()
+            for line in lines:
+                if line:
+                    yield json.loads(line)
+        if pending:
+            yield json.loads(pending)
+
+def verify_export(path, password):
+    """Authenticate every frame of an encrypted export
+    
+    Returns a dict with the number of ``frames``, ``records`` and
+    plaintext ``bytes``; raises when the file is damaged.
+    """
+    frames = records = size = 0
+    with open(path, 'rb') as f:
+        for plaintext in iter_frames(f, password):
+            frames += 1
+            size += len(plaintext)
+            records += plaintext.count(b'\n')
+    return {'frames': frames, 'records': records, 'bytes': size}
+
+def _export_kdf_params(password_manager):
+    """Use the vault's KDF cost with a fresh salt for the export password"""
+    current = password_manager.get_kdf_params()
+    if current is None:
+        return new_kdf_params()
+    if current['algorithm'] == 'scrypt':
+        return new_kdf_params('scrypt', n=current['n'])
+    return new_kdf_params(current['algorithm'], iterations=current['iterations'])
+
+def export_vault(password_manager, path, fmt='encrypted', password=None,
+                 progress_callback=None, frame_size=FRAME_SIZE):
+    """Stream the vault to ``path`` as an encrypted container, CSV or JSON
+    
+    Rows are read page by page, so memory use does not grow with the vault.
+    The file is written next to ``path`` and moved into place only when
+    every row was written or reported in ``errors``; on any failure the
+    partial file is removed and the error raised.
+    ``progress_callback(done, total)`` is called every 500 rows.
+    Returns a dict with the number of ``exported`` rows and the ids of
+    rows that could not be decrypted (``errors``).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    if fmt == 'encrypted' and not password:
+        raise ValueError("An export password is required")
+    
+    total = password_manager.count_passwords()
+    temp_path = f"{path}.part"
+    exported = 0
+    errors = []
+    
+    try:
+        with open(temp_path, 'wb') as f:
+            if fmt == 'encrypted':
+                writer = FrameWriter(f, password, _export_kdf_params(password_manager), frame_size)
+                for row in iter_export_records(password_manager, errors):
+                    writer.write(json.dumps(row).encode() + b'\n')
+                    exported += 1
+                    if progress_callback and exported % 500 == 0:
+                        progress_callback(exported, total)
+                writer.close()
+            
+            elif fmt == 'csv':
+                text = io.TextIOWrapper(f, encoding='utf-8', newline='')
+                writer = csv.DictWriter(text, fieldnames=EXPORT_FIELDS)
+                writer.writeheader()
+                for row in iter_export_records(password_manager, errors):
+                    writer.writerow(row)
+                    exported += 1
+                    if progress_callback and exported % 500 == 0:
+                        progress_callback(exported, total)
+                text.flush()
+                text.detach()
+            
+            else:
+                f.write(b'[')
+                for row in iter_export_records(password_manager, errors):
+                    f.write((b',\n' if exported else b'\n') + json.dumps(row).encode())
+                    exported += 1
+                    if progress_callback and exported % 500 == 0:
+                        progress_callback(exported, total)
+                f.write(b'\n]\n')
+        
+        if exported + len(errors) != total:
+            raise RuntimeError(
+                f"Export incomplete: {exported} of {total} passwords written, "
+                f"{len(errors)} unreadable"
+            )
+        os.replace(temp_path, path)
+    except BaseException:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+    
+    if progress_callback:
+        progress_callback(exported, total)
+    return {'exported': exported, 'errors': errors}
\ No newline at end of file
@@ -0,0 +1,271 @@
+"""
+Streaming importers for password manager exports
+"""
+
+import csv
+import json
+import os
+import xml.etree.ElementTree as ET
+from urllib.parse import urlparse
+
+# Column names used by the supported exports, per record field
+FIELD_ALIASES = {
+    'title': ('title', 'name', 'account', 'entry'),
+    'username': ('username', 'login_username', 'login', 'user', 'user name', 'email'),
+    'password': ('password', 'login_password', 'pass'),
+    'website': ('url', 'website', 'login_uri', 'uri', 'web site'),
+    'notes': ('notes', 'note', 'extra', 'comments'),
+    'category': ('category', 'folder', 'group', 'grouping'),
+}
+
+# Bytes read at a time by the streaming JSON reader
+READ_SIZE = 64 * 1024
+
+def _title_from_url(url):
+    """Use the host name as title for exports without one (Firefox)"""
+    if not url:
+        return ''
+    host = urlparse(url if '://' in url else f'//{url}').hostname
+    return host or url
+
+def map_fields(row, aliases=FIELD_ALIASES):
+    """Map a row with export specific column names to a record dict"""
+    lowered = {str(key).strip().lower(): value for key, value in row.items() if key is not None}
+    record = {}
+    for field, names in aliases.items():
+        for name in names:
+            value = lowered.get(name)
+            if value:
+                record[field] = value.strip() if field != 'password' else value
+                break
+    
+    if not record.get('title'):
+        record['title'] = _title_from_url(record.get('website'))
+    return record
+
+def read_csv(path):
+    """Yield records from a CSV export (generic, Chrome, Firefox, Bitwarden CSV)"""
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        for row in csv.DictReader(f):
+            yield map_fields(row)
+
+def _iter_json_values(f):
+    """Yield (key, value) for a top-level JSON object, streaming arrays
+    
+    Elements of top-level arrays are decoded and yielded one at a time as
+    (key, element); other values are yielded as (key, value). Only one
+    element is held in memory at a time.
+    """
+    decoder = json.JSONDecoder()
+    buffer = ''
+    pos = 0
+    eof = False
+    
+    def fill():
+        nonlocal buffer, pos, eof
+        chunk = f.read(READ_SIZE)
+        if not chunk:
+            eof = True
+        buffer = buffer[pos:] + chunk
+        pos = 0
+    
+    def skip(chars):
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos] in chars:
+                pos += 1
+            if pos < len(buffer) or eof:
+                return
+            fill()
+    
+    def expect(char):
+        nonlocal pos
+        skip(' \t\r\n')
+        if pos >= len(buffer) or buffer[pos] != char:
+            raise ValueError(f"Invalid JSON export: expected '{char}'")
+        pos += 1
+    
+    def peek():
+        skip(' \t\r\n')
+        return buffer[pos] if pos < len(buffer) else ''
+    
+    def decode():
+        nonlocal pos
+        skip(' \t\r\n')
+        while True:
+            try:
+                value, end = decoder.raw_decode(buffer, pos)
+                # A number at the end of the buffer may continue in the next chunk
+                if end < len(buffer) or eof:
+                    pos = end
+                    return value
+            except json.JSONDecodeError:
+                if eof:
+                    raise
+            fill()
+    
+    expect('{')
+    if peek() == '}':
+        return
+    
+    while True:
+        key = decode()
+        expect(':')
+        if peek() == '[':
+            expect('[')
+            if peek() != ']':
+                while True:
+                    yield key, decode()
+                    if peek() != ',':
+                        break
+                    expect(',')
+            expect(']')
+        else:
+            yield key, decode()
+        
+        if peek() != ',':
+            break
+        expect(',')
+    expect('}')
+
+def read_bitwarden_json(path):
+    """Yield login records from an unencrypted Bitwarden JSON export"""
+    folders = {}
+    with open(path, encoding='utf-8-sig') as f:
+        for key, value in _iter_json_values(f):
+            if key == 'encrypted' and value:
+                raise ValueError("Encrypted Bitwarden exports are not supported")
+            if key == 'folders':
+                folders[value.get('id')] = value.get('name')
+            elif key == 'items' and value.get('type') == 1:
+                login = value.get('login') or {}
+                uris = login.get('uris') or []
+                yield {
+                    'title': value.get('name') or '',
+                    'username': login.get('username') or '',
+                    'password': login.get('password') or '',
+                    'website': (uris[0].get('uri') or '') if uris else '',
+                    'notes': value.get('notes') or '',
+                    'category': folders.get(value.get('folderId'))
+                }
+
+def read_keepass_xml(path):
+    """Yield records from a KeePass 2 XML export using iterparse
+    
+    Finished Entry, Group and Meta elements are removed from their parent,
+    so memory use does not grow with the size of the file.
+    """
+    groups = []
+    # Open elements from the root down; the last one is the current element
+    parents = []
+    
+    for event, elem in ET.iterparse(path, events=('start', 'end')):
+        if event == 'start':
+            parents.append(elem)
+            if elem.tag == 'Group':
+                groups.append(None)
+            continue
+        
+        parents.pop()
+        parent = parents[-1] if parents else None
+        if elem.tag == 'Name' and parent is not None and parent.tag == 'Group':
+            groups[-1] = elem.text
+        elif elem.tag == 'Entry':
+            # Old versions of an entry are stored under <History>
+            if not any(open_elem.tag == 'History' for open_elem in parents):
+                fields = {}
+                for string in elem.findall('String'):
+                    fields[string.findtext('Key', '')] = string.findtext('Value') or ''
+                yield {
+                    'title': fields.get('Title', '') or _title_from_url(fields.get('URL')),
+                    'username': fields.get('UserName', ''),
+                    'password': fields.get('Password', ''),
+                    'website': fields.get('URL', ''),
+                    'notes': fields.get('Notes', ''),
+                    # The root group is the database itself, not a category
+                    'category': groups[-1] if len(groups) > 1 else None
+                }
+            elem.clear()
+            if parent is not None:
+                parent.remove(elem)
+        elif elem.tag == 'Group':
+            groups.pop()
+            elem.clear()
+            if parent is not None:
+                parent.remove(elem)
+        elif elem.tag == 'Meta':
+            # Custom icons and binaries can be large and are not imported
+            elem.clear()
+            if parent is not None:
+                parent.remove(elem)
+
+# Supported formats: name -> (label, reader)
+FORMATS = {
+    'csv': ("Generic CSV", read_csv),
+    'chrome': ("Chrome CSV", read_csv),
+    'firefox': ("Firefox CSV", read_csv),
+    'bitwarden': ("Bitwarden JSON", read_bitwarden_json),
+    'keepass': ("KeePass XML", read_keepass_xml),
+}
+
+def detect_format(path):
+    """Guess the export format from the file name and first line"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.xml':
+        return 'keepass'
+    if extension == '.json':
+        return 'bitwarden'
+    
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        header = f.readline().lower()
+    if 'httprealm' in header:
+        return 'firefox'
+    if header.startswith('name,url,username,password'):
+        return 'chrome'
+    return 'csv'
+
+def read_records(path, fmt=None):
+    """Yield record dicts from an export file"""
+    fmt = fmt or detect_format(path)
+    if fmt not in FORMATS:
+        raise ValueError(f"Unsupported import format: {fmt}")
+    return FORMATS[fmt][1](path)
+
+def _record_key(record):
+    """Key used to detect duplicate entries"""
+    return (
+        (record.get('title') or '').strip().casefold(),
+        (record.get('username') or '').strip().casefold(),
+        (record.get('website') or '').strip().casefold()
+    )
+
+def import_file(password_manager, path, fmt=None, skip_duplicates=True,
+                batch_size=1000, progress_callback=None):
+    """Stream an export file into the vault with PasswordManager.bulk_add
+    
+    With ``skip_duplicates`` entries whose title, username and website
+    match an existing entry (or an earlier one in the file) are skipped.
+    Returns the bulk_add result with an extra ``skipped`` count.
+    """
+    seen = set()
+    if skip_duplicates:
+        seen.update(_record_key(record) for record in password_manager.iter_passwords())
+    skipped = 0
+    
+    def unique(records):
+        nonlocal skipped
+        for record in records:
+            if skip_duplicates:
+                key = _record_key(record)
+                if key in seen:
+                    skipped += 1
+                    continue
+                seen.add(key)
+            yield record
+    
+    result = password_manager.bulk_add(
+        unique(read_records(path, fmt)), batch_size=batch_size,
+        progress_callback=progress_callback
+    )
+    result['skipped'] = skipped
+    return result
\ No newline at end of file
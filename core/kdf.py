@@ -0,0 +1,107 @@
+"""
+Password key derivation, calibration and benchmarking
+"""
+
+import argparse
+import hashlib
+import secrets
+import time
+
+# Version of the key derivation header stored in the vault
+KDF_VERSION = 2
+
+KDF_ALGORITHMS = ('pbkdf2-sha256', 'scrypt')
+DEFAULT_ALGORITHM = 'pbkdf2-sha256'
+DEFAULT_ITERATIONS = 100000
+DEFAULT_TARGET_MS = 300
+
+# Lower bounds keep calibration on very slow machines from going unsafe
+MIN_PBKDF2_ITERATIONS = 50000
+MIN_SCRYPT_N = 2 ** 14
+MAX_SCRYPT_N = 2 ** 17          # 128 MiB with r=8
+SCRYPT_R = 8
+SCRYPT_P = 1
+
+def new_kdf_params(algorithm=DEFAULT_ALGORITHM, iterations=DEFAULT_ITERATIONS, n=MIN_SCRYPT_N):
+    """Create a KDF parameters record with a fresh salt"""
+    if algorithm not in KDF_ALGORITHMS:
+        raise ValueError(f"Unsupported KDF algorithm: {algorithm}")
+    
+    params = {
+        'version': KDF_VERSION,
+        'algorithm': algorithm,
+        'salt': secrets.token_hex(16)
+    }
+    if algorithm == 'scrypt':
+        params.update({'n': n, 'r': SCRYPT_R, 'p': SCRYPT_P})
+    else:
+        params['iterations'] = iterations
+    return params
+
+def derive_master_secret(password, params):
+    """Run the expensive password KDF once and return the master secret"""
+    salt = bytes.fromhex(params['salt'])
+    
+    if params['algorithm'] == 'scrypt':
+        n, r, p = params['n'], params['r'], params['p']
+        return hashlib.scrypt(
+            password.encode(), salt=salt, n=n, r=r, p=p,
+            maxmem=2 * 128 * n * r * p, dklen=32
+        )
+    
+    if params['algorithm'] == 'pbkdf2-sha256':
+        return hashlib.pbkdf2_hmac('sha256', password.encode(), salt, params['iterations'], dklen=32)
+    
+    raise ValueError(f"Unsupported KDF algorithm: {params['algorithm']}")
+
+def measure_kdf(params, rounds=1):
+    """Return the fastest of ``rounds`` derivations in milliseconds"""
+    best = None
+    for _ in range(rounds):
+        start = time.perf_counter()
+        derive_master_secret("calibration-password", params)
+        elapsed = (time.perf_counter() - start) * 1000
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+def calibrate_kdf_params(algorithm=DEFAULT_ALGORITHM, target_ms=DEFAULT_TARGET_MS):
+    """Pick KDF parameters that take about ``target_ms`` on this machine"""
+    if algorithm == 'scrypt':
+        # scrypt cost grows linearly with n; keep n a power of two
+        probe = new_kdf_params('scrypt', n=MIN_SCRYPT_N)
+        per_n = measure_kdf(probe, rounds=2) / MIN_SCRYPT_N
+        n = MIN_SCRYPT_N
+        while n < MAX_SCRYPT_N and per_n * n * 2 <= target_ms:
+            n *= 2
+        return new_kdf_params('scrypt', n=n)
+    
+    probe_iterations = 20000
+    probe = new_kdf_params('pbkdf2-sha256', iterations=probe_iterations)
+    elapsed = max(measure_kdf(probe, rounds=2), 0.001)
+    iterations = int(probe_iterations * target_ms / elapsed)
+    iterations = max(MIN_PBKDF2_ITERATIONS, iterations // 1000 * 1000)
+    return new_kdf_params('pbkdf2-sha256', iterations=iterations)
+
+def describe_kdf_params(params):
+    """Short human readable description of a KDF parameters record"""
+    if params['algorithm'] == 'scrypt':
+        memory_mib = 128 * params['n'] * params['r'] // (1024 * 1024)
+        return f"scrypt n={params['n']} r={params['r']} p={params['p']} ({memory_mib} MiB)"
+    return f"pbkdf2-sha256 iterations={params['iterations']}"
+
+def main(argv=None):
+    """Benchmark command: python -m core.kdf"""
+    parser = argparse.ArgumentParser(description="Calibrate the SavePassword unlock KDF")
+    parser.add_argument('--algorithm', choices=KDF_ALGORITHMS, default=DEFAULT_ALGORITHM)
+    parser.add_argument('--target-ms', type=int, default=DEFAULT_TARGET_MS)
+    args = parser.parse_args(argv)
+    
+    print(f"Calibrating {args.algorithm} for ~{args.target_ms} ms unlock time...")
+    params = calibrate_kdf_params(args.algorithm, args.target_ms)
+    elapsed = measure_kdf(params, rounds=3)
+    
+    print(f"Selected: {describe_kdf_params(params)}")
+    print(f"Measured unlock time: {elapsed:.0f} ms")
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
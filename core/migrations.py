@@ -0,0 +1,259 @@
+"""
+Versioned schema migrations for the vault database
+
+The schema version is kept in ``PRAGMA user_version``. Every entry in
+MIGRATIONS upgrades the schema by one version; pending steps run in one
+transaction after a backup copy of the database has been written.
+"""
+
+import sqlite3
+
+from core.records import website_host
+
+def _create_base_tables(cursor):
+    """Version 1: categories, passwords and settings"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS categories (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            name TEXT UNIQUE NOT NULL,
+            parent_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (parent_id) REFERENCES categories (id)
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS passwords (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            title TEXT NOT NULL,
+            username TEXT,
+            encrypted_password TEXT NOT NULL,
+            website TEXT,
+            notes TEXT,
+            category_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (category_id) REFERENCES categories (id)
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT
+        )
+    ''')
+
+def _create_search_index(cursor):
+    """Version 2: FTS5 search index and the triggers that keep it in sync"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'passwords_fts'")
+    exists = cursor.fetchone() is not None
+    
+    try:
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS passwords_fts USING fts5(
+                title, username, website, notes, category,
+                tokenize = 'unicode61 remove_diacritics 2',
+                prefix = '2 3'
+            )
+        ''')
+    except sqlite3.OperationalError:
+        # SQLite build without FTS5, search falls back to LIKE
+        return
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS passwords_fts_insert AFTER INSERT ON passwords BEGIN
+            INSERT INTO passwords_fts (rowid, title, username, website, notes, category)
+            VALUES (new.id, new.title, new.username, new.website, new.notes,
+                    (SELECT name FROM categories WHERE id = new.category_id));
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS passwords_fts_update
+        AFTER UPDATE OF title, username, website, notes, category_id ON passwords BEGIN
+            UPDATE passwords_fts
+            SET title = new.title, username = new.username, website = new.website,
+                notes = new.notes,
+                category = (SELECT name FROM categories WHERE id = new.category_id)
+            WHERE rowid = new.id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS passwords_fts_delete AFTER DELETE ON passwords BEGIN
+            DELETE FROM passwords_fts WHERE rowid = old.id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS categories_fts_rename AFTER UPDATE OF name ON categories BEGIN
+            UPDATE passwords_fts SET category = new.name
+            WHERE rowid IN (SELECT id FROM passwords WHERE category_id = new.id);
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS categories_fts_delete AFTER DELETE ON categories BEGIN
+            UPDATE passwords_fts SET category = NULL
+            WHERE rowid IN (SELECT id FROM passwords WHERE category_id = old.id);
+        END
+    ''')
+    
+    if not exists:
+        # Index entries that were stored before the index existed
+        cursor.execute('''
+            INSERT INTO passwords_fts (rowid, title, username, website, notes, category)
+            SELECT p.id, p.title, p.username, p.website, p.notes, c.name
+            FROM passwords p
+            LEFT JOIN categories c ON p.category_id = c.id
+        ''')
+
+def _create_password_indexes(cursor):
+    """Version 3: indexes for category browsing, title order, recent changes and hosts"""
+    cursor.execute("ALTER TABLE passwords ADD COLUMN website_host TEXT")
+    cursor.execute("SELECT id, website FROM passwords WHERE website IS NOT NULL AND website != ''")
+    cursor.executemany(
+        "UPDATE passwords SET website_host = ? WHERE id = ?",
+        [(website_host(website), password_id) for password_id, website in cursor.fetchall()]
+    )
+    
+    # (category_id, title) serves category filters together with the title order
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_passwords_category_title
+        ON passwords (category_id, title COLLATE NOCASE)
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_passwords_title
+        ON passwords (title COLLATE NOCASE)
+    ''')
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_passwords_updated_at ON passwords (updated_at)")
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_passwords_website_host
+        ON passwords (website_host, title COLLATE NOCASE)
+    ''')
+
+def _create_category_parent_index(cursor):
+    """Version 4: index for walking the category tree downwards"""
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_categories_parent ON categories (parent_id)")
+
+def _create_category_closure(cursor):
+    """Version 5: closure table with every (ancestor, descendant) category pair"""
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS category_closure (
+            ancestor_id INTEGER NOT NULL,
+            descendant_id INTEGER NOT NULL,
+            depth INTEGER NOT NULL,
+            PRIMARY KEY (ancestor_id, descendant_id)
+        ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+        CREATE INDEX IF NOT EXISTS idx_category_closure_descendant
+        ON category_closure (descendant_id)
+    ''')
+    
+    # Rows carry their depth, so UNION cannot stop a parent cycle in existing
+    # data; the depth < 1000 cap ends the recursion and MIN(depth) keeps the
+    # shortest path for each pair
+    cursor.execute('''
+        INSERT OR IGNORE INTO category_closure (ancestor_id, descendant_id, depth)
+        WITH RECURSIVE closure (ancestor_id, descendant_id, depth) AS (
+            SELECT id, id, 0 FROM categories
+            UNION
+            SELECT cl.ancestor_id, c.id, cl.depth + 1
+            FROM closure cl JOIN categories c ON c.parent_id = cl.descendant_id
+            WHERE cl.depth < 1000
+        )
+        SELECT ancestor_id, descendant_id, MIN(depth) FROM closure
+        GROUP BY ancestor_id, descendant_id
+    ''')
+    
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS categories_closure_insert AFTER INSERT ON categories BEGIN
+            INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+            SELECT ancestor_id, new.id, depth + 1 FROM category_closure
+            WHERE descendant_id = new.parent_id
+            UNION ALL
+            SELECT new.id, new.id, 0;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS categories_closure_move
+        AFTER UPDATE OF parent_id ON categories BEGIN
+            DELETE FROM category_closure
+            WHERE descendant_id IN (SELECT descendant_id FROM category_closure WHERE ancestor_id = new.id)
+              AND ancestor_id NOT IN (SELECT descendant_id FROM category_closure WHERE ancestor_id = new.id);
+            INSERT INTO category_closure (ancestor_id, descendant_id, depth)
+            SELECT a.ancestor_id, d.descendant_id, a.depth + d.depth + 1
+            FROM category_closure a, category_closure d
+            WHERE a.descendant_id = new.parent_id AND d.ancestor_id = new.id;
+        END
+    ''')
+    cursor.execute('''
+        CREATE TRIGGER IF NOT EXISTS categories_closure_delete AFTER DELETE ON categories BEGIN
+            DELETE FROM category_closure WHERE descendant_id = old.id OR ancestor_id = old.id;
+        END
+    ''')
+
+# Ordered schema upgrades; MIGRATIONS[n] upgrades version n to n + 1.
+# Append new steps only, never reorder or change released ones.
+MIGRATIONS = (
+    _create_base_tables,
+    _create_search_index,
+    _create_password_indexes,
+    _create_category_parent_index,
+    _create_category_closure,
+)
+
+SCHEMA_VERSION = len(MIGRATIONS)
+
+def get_schema_version(conn):
+    """Read the schema version of a database"""
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+def backup_database(conn, db_path, version):
+    """Copy the database next to itself before migrating it
+    
+    Returns the backup path, or None for in-memory and empty databases.
+    """
+    if db_path == ':memory:':
+        return None
+    cursor = conn.execute("SELECT COUNT(*) FROM sqlite_master")
+    if not cursor.fetchone()[0]:
+        return None
+    
+    backup_path = f"{db_path}.v{version}.bak"
+    target = sqlite3.connect(backup_path)
+    try:
+        conn.backup(target)
+    finally:
+        target.close()
+    return backup_path
+
+def migrate(conn, db_path):
+    """Bring the schema up to SCHEMA_VERSION
+    
+    Returns the list of versions that were applied (empty when the schema
+    was already current, in which case no DDL runs at all).
+    """
+    version = get_schema_version(conn)
+    if version >= SCHEMA_VERSION:
+        if version > SCHEMA_VERSION:
+            print(f"Warning: database schema v{version} is newer than this version (v{SCHEMA_VERSION})")
+        return []
+    
+    backup_database(conn, db_path, version)
+    
+    # Explicit BEGIN: the sqlite3 module does not wrap DDL in a transaction
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        # Another process may have migrated while we waited for the lock
+        version = get_schema_version(conn)
+        cursor = conn.cursor()
+        applied = []
+        for index in range(version, SCHEMA_VERSION):
+            MIGRATIONS[index](cursor)
+            applied.append(index + 1)
+        # PRAGMA does not take parameters; the value is an int
+        cursor.execute(f"PRAGMA user_version = {SCHEMA_VERSION:d}")
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+    return applied
\ No newline at end of file
@@ -5,9 +5,22 @@ Password Manager Core Logic
 import sqlite3
 import json
 import hashlib
+import hmac
 import secrets
 from datetime import datetime
-from core.crypto import CryptoManager
+from core.crypto import CryptoManager, VaultLockedError, wrap_key, unwrap_key
+from core.records import PasswordRecord, website_host, search_tokens
+from core.kdf import calibrate_kdf_params, DEFAULT_TARGET_MS
+from core.database import ConnectionManager
+from core.secret_cache import SecretCache
+from core.events import (
+    ChangeBus, ChangeEvent, PASSWORD_INSERTED, PASSWORD_UPDATED, PASSWORD_DELETED,
+    PASSWORDS_RELOADED, CATEGORY_ADDED
+)
+from core.migrations import migrate, get_schema_version, SCHEMA_VERSION
+
+# Settings needed to unlock the vault (cached by _get_unlock_header)
+UNLOCK_HEADER_KEYS = ('kdf_header', 'master_password_hash', 'wrapped_data_key')
 
 class PasswordManager:
     """Main password management class"""
@@ -15,230 +28,642 @@ class PasswordManager:
     def __init__(self, db_path="passwords.db"):
         self.db_path = db_path
         self.crypto = CryptoManager()
+        self.db = ConnectionManager(db_path)
+        self.changes = ChangeBus()
+        self.secret_cache = SecretCache()
+        self.fts_enabled = False
+        self._stats_cache = None
+        self._category_tree_cache = None
+        self._category_counts_cache = None
+        self._cache_generation = 0
+        self._unlock_header = None
         self.initialize_database()
     
     def initialize_database(self):
-        """Initialize database tables"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        
-        # Categories table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS categories (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                name TEXT UNIQUE NOT NULL,
-                parent_id INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (parent_id) REFERENCES categories (id)
-            )
-        ''')
-        
-        # Passwords table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS passwords (
-                id INTEGER PRIMARY KEY AUTOINCREMENT,
-                title TEXT NOT NULL,
-                username TEXT,
-                encrypted_password TEXT NOT NULL,
-                website TEXT,
-                notes TEXT,
-                category_id INTEGER,
-                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                updated_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                FOREIGN KEY (category_id) REFERENCES categories (id)
-            )
-        ''')
-        
-        # Settings table
-        cursor.execute('''
-            CREATE TABLE IF NOT EXISTS settings (
-                key TEXT PRIMARY KEY,
-                value TEXT
-            )
-        ''')
+        """Bring the database schema up to date (no DDL when it is current)"""
+        with self.db.connection() as conn:
+            if get_schema_version(conn) < SCHEMA_VERSION:
+                migrate(conn, self.db_path)
+            cursor = conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'passwords_fts'")
+            self.fts_enabled = cursor.fetchone() is not None
+    
+    def close(self):
+        """Close all database connections and wipe decrypted entries"""
+        self._invalidate_caches(categories=True)
+        self.secret_cache.clear()
+        self.db.close()
+    
+    def _invalidate_caches(self, categories=False):
+        """Drop cached aggregates after a write (and the tree after category writes)"""
+        self._cache_generation += 1
+        self._stats_cache = None
+        self._category_counts_cache = None
+        if categories:
+            self._category_tree_cache = None
+    
+    def lock(self):
+        """Drop the encryption key and release database connections
         
-        conn.commit()
-        conn.close()
+        Until the next verify_master_password, work that is still running
+        fails instead of reopening connections or storing plaintext. The
+        unlock header (KDF parameters, verifier and wrapped data key) is
+        not secret and stays cached, so unlocking again only runs the KDF.
+        """
+        self.crypto.clear_key()
+        self.close()
     
     def is_master_password_set(self):
         """Check if master password is set"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT value FROM settings WHERE key = 'master_password_hash'")
-            result = cursor.fetchone()
-            conn.close()
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT value FROM settings WHERE key = 'master_password_hash'")
+                result = cursor.fetchone()
             return result is not None
         except:
             return False
     
-    def set_master_password(self, password):
-        """Set master password"""
-        salt = secrets.token_hex(16)
-        password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
-        stored_hash = f"{salt}:{password_hash.hex()}"
-        
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-        cursor.execute(
+    def _get_setting(self, key, default=None):
+        """Read a value from the settings table"""
+        with self.db.connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute("SELECT value FROM settings WHERE key = ?", (key,))
+            result = cursor.fetchone()
+        return result[0] if result else default
+    
+    def _set_setting(self, conn, key, value):
+        """Write a value to the settings table using an open connection"""
+        if key in UNLOCK_HEADER_KEYS:
+            self._unlock_header = None
+        conn.execute(
             "INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)",
-            ('master_password_hash', stored_hash)
+            (key, value)
         )
-        conn.commit()
-        conn.close()
+    
+    def _get_unlock_header(self):
+        """Get (kdf_params, verifier_hex, wrapped_data_key_hex), read once
         
-        # Set encryption key
-        self.crypto.set_key_from_password(password)
+        Returns None for vaults without a KDF header (legacy or not set up).
+        """
+        if self._unlock_header is None:
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(
+                    "SELECT key, value FROM settings WHERE key IN (?, ?, ?)", UNLOCK_HEADER_KEYS
+                )
+                values = dict(cursor.fetchall())
+            if values.get('kdf_header') and values.get('master_password_hash'):
+                self._unlock_header = (
+                    json.loads(values['kdf_header']),
+                    values['master_password_hash'],
+                    values.get('wrapped_data_key')
+                )
+        return self._unlock_header
+    
+    def get_kdf_params(self):
+        """Get the stored key derivation parameters"""
+        header = self._get_setting('kdf_header')
+        return json.loads(header) if header else None
+    
+    def _store_master_password(self, password, kdf_params):
+        """Create a data key, store it wrapped with the verifier, and unlock"""
+        verifier, key_encryption_key = self.crypto.derive_keys(password, kdf_params)
+        data_key = secrets.token_bytes(32)
+        
+        with self.db.transaction() as conn:
+            self._set_setting(conn, 'kdf_header', json.dumps(kdf_params))
+            self._set_setting(conn, 'master_password_hash', verifier.hex())
+            self._set_setting(conn, 'wrapped_data_key', wrap_key(key_encryption_key, data_key).hex())
+        
+        self.crypto.set_key(data_key)
+    
+    def _default_kdf_params(self):
+        """Calibrate KDF parameters for the configured unlock time"""
+        target_ms = int(self._get_setting('kdf_target_ms', DEFAULT_TARGET_MS))
+        return calibrate_kdf_params(target_ms=target_ms)
+    
+    def set_master_password(self, password, kdf_params=None):
+        """Set master password"""
+        if kdf_params is None:
+            kdf_params = self._default_kdf_params()
+        self._store_master_password(password, kdf_params)
         return True
     
     def verify_master_password(self, password):
         """Verify master password"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT value FROM settings WHERE key = 'master_password_hash'")
-            result = cursor.fetchone()
-            conn.close()
+            self.db.reopen()
+            if self._get_unlock_header() is None:
+                stored_hash = self._get_setting('master_password_hash')
+                if not stored_hash:
+                    return False
+                return self._verify_legacy_master_password(password, stored_hash)
             
-            if not result:
+            return self._unlock(password) is not None
+        except Exception as e:
+            print(f"Error verifying master password: {e}")
+            return False
+    
+    def _unlock(self, password, resume_rekey=True):
+        """Check the password and load the data key
+        
+        An interrupted rotate_data_key is finished first, because rows up
+        to its checkpoint are already under the next key. Returns the
+        password-derived key encryption key, or None when the password is
+        wrong.
+        """
+        kdf_params, stored_hash, wrapped = self._get_unlock_header()
+        verifier, key_encryption_key = self.crypto.derive_keys(password, kdf_params)
+        if not hmac.compare_digest(verifier.hex(), stored_hash):
+            return None
+        
+        if wrapped is None:
+            # Older vaults encrypt with the derived key; adopt it as data key
+            data_key = key_encryption_key
+            with self.db.transaction() as conn:
+                self._set_setting(conn, 'wrapped_data_key', wrap_key(key_encryption_key, data_key).hex())
+        else:
+            data_key = unwrap_key(key_encryption_key, bytes.fromhex(wrapped))
+        
+        self.crypto.set_key(data_key)
+        
+        if resume_rekey:
+            checkpoint = self.get_rekey_checkpoint()
+            if checkpoint is not None:
+                try:
+                    self._finish_rotation(key_encryption_key, checkpoint)
+                except Exception:
+                    # Half the rows cannot be read with the old key alone
+                    self.crypto.clear_key()
+                    raise
+        return key_encryption_key
+    
+    def _verify_legacy_master_password(self, password, stored_hash):
+        """Verify a pre-header "salt:hash" entry and migrate it"""
+        # Legacy entries always used 100000 PBKDF2 iterations
+        salt, stored_password_hash = stored_hash.split(':')
+        password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
+        
+        if not hmac.compare_digest(password_hash.hex(), stored_password_hash):
+            return False
+        
+        # Upgrade to the versioned header so later unlocks need one KDF run
+        self.set_master_password(password)
+        return True
+    
+    def change_master_password(self, old_password, new_password, kdf_params=None):
+        """Change the master password by re-wrapping the data key
+        
+        Records stay encrypted under the data key, so this only runs the
+        KDF and rewrites three settings, whatever the size of the vault.
+        """
+        try:
+            if not self.verify_master_password(old_password):
                 return False
             
-            stored_hash = result[0]
-            salt, stored_password_hash = stored_hash.split(':')
+            if kdf_params is None:
+                kdf_params = self._default_kdf_params()
+            verifier, key_encryption_key = self.crypto.derive_keys(new_password, kdf_params)
             
-            # Verify password
-            password_hash = hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), 100000)
+            with self.db.transaction() as conn:
+                self._set_setting(conn, 'kdf_header', json.dumps(kdf_params))
+                self._set_setting(conn, 'master_password_hash', verifier.hex())
+                self._set_setting(
+                    conn, 'wrapped_data_key', wrap_key(key_encryption_key, self.crypto.key).hex()
+                )
+            return True
+        except Exception as e:
+            print(f"Error changing master password: {e}")
+            return False
+    
+    def update_kdf_params(self, password, kdf_params):
+        """Switch to new KDF parameters (re-wraps the data key)"""
+        return self.change_master_password(password, password, kdf_params)
+    
+    def get_rekey_checkpoint(self):
+        """Get the resume marker of an interrupted re-key (None if there is none)"""
+        checkpoint = self._get_setting('rekey_checkpoint')
+        return json.loads(checkpoint) if checkpoint else None
+    
+    def rotate_data_key(self, password, batch_size=500, progress_callback=None):
+        """Re-encrypt the vault under a new random data key
+        
+        Needed only when the data key itself may have leaked (or to stop
+        using the derived key that older vaults adopted as data key).
+        Rows are re-encrypted in id order, ``batch_size`` rows per
+        transaction. Each transaction also stores a checkpoint in the
+        ``rekey_checkpoint`` setting, with the new key wrapped by the
+        current one, so an interrupted rotation keeps its progress. It is
+        finished by the next unlock (or by calling this again) before the
+        vault is used, so no write can land under the old key behind the
+        checkpoint. Other writes must not run while this is in progress.
+        ``progress_callback(done, total)`` is called after every batch.
+        """
+        try:
+            if self.get_kdf_params() is None and not self.verify_master_password(password):
+                return False
+            key_encryption_key = self._unlock(password, resume_rekey=False)
+            if key_encryption_key is None:
+                return False
             
-            if password_hash.hex() == stored_password_hash:
-                # Set encryption key
-                self.crypto.set_key_from_password(password)
-                return True
+            checkpoint = self.get_rekey_checkpoint()
+            if checkpoint is None:
+                checkpoint = {
+                    'next_key': wrap_key(self.crypto.key, secrets.token_bytes(32)).hex(),
+                    'last_id': 0,
+                    'done': 0,
+                    'skipped': 0
+                }
+                with self.db.transaction() as conn:
+                    self._set_setting(conn, 'rekey_checkpoint', json.dumps(checkpoint))
             
+            self._finish_rotation(key_encryption_key, checkpoint, batch_size, progress_callback)
+            return True
+        except Exception as e:
+            print(f"Error rotating data key: {e}")
             return False
-        except:
+    
+    def _finish_rotation(self, key_encryption_key, checkpoint, batch_size=500, progress_callback=None):
+        """Re-key the rows after the checkpoint and switch to the new data key"""
+        try:
+            new_key = unwrap_key(self.crypto.key, bytes.fromhex(checkpoint['next_key']))
+            new_crypto = CryptoManager()
+            new_crypto.set_key(new_key)
+            self._rekey_rows(self.crypto, new_crypto, checkpoint, batch_size, progress_callback)
+            
+            with self.db.transaction() as conn:
+                self._set_setting(conn, 'wrapped_data_key', wrap_key(key_encryption_key, new_key).hex())
+                conn.execute("DELETE FROM settings WHERE key = 'rekey_checkpoint'")
+            
+            # Existing PasswordRecords share self.crypto; switch its key in place
+            self.crypto.set_key(new_key)
+            if checkpoint['skipped']:
+                print(f"Warning: {checkpoint['skipped']} unreadable passwords were not re-keyed")
+        finally:
+            self._invalidate_caches()
+            self.secret_cache.clear()
+    
+    def _rekey_rows(self, old_crypto, new_crypto, checkpoint, batch_size, progress_callback):
+        """Re-encrypt the rows after the checkpoint, one committed batch at a time"""
+        with self.db.connection() as conn:
+            cursor = conn.execute(
+                "SELECT COUNT(*) FROM passwords WHERE id > ?", (checkpoint['last_id'],)
+            )
+            total = checkpoint['done'] + cursor.fetchone()[0]
+        
+        while True:
+            with self.db.transaction() as conn:
+                cursor = conn.execute(
+                    "SELECT id, encrypted_password FROM passwords WHERE id > ? ORDER BY id LIMIT ?",
+                    (checkpoint['last_id'], batch_size)
+                )
+                rows = cursor.fetchall()
+                if not rows:
+                    return
+                
+                decrypted = old_crypto.decrypt_many([row[1] for row in rows])
+                updates = []
+                for (password_id, _), (plaintext, error) in zip(rows, decrypted):
+                    if error is not None:
+                        # Unreadable rows stay as they are
+                        checkpoint['skipped'] += 1
+                        continue
+                    updates.append((new_crypto.encrypt(plaintext), password_id))
+                
+                conn.executemany(
+                    "UPDATE passwords SET encrypted_password = ? WHERE id = ?", updates
+                )
+                checkpoint['last_id'] = rows[-1][0]
+                checkpoint['done'] += len(rows)
+                self._set_setting(conn, 'rekey_checkpoint', json.dumps(checkpoint))
+            
+            if progress_callback:
+                progress_callback(checkpoint['done'], total)
+    
+    def recalibrate_kdf(self, password, target_ms=None, algorithm=None):
+        """Measure this machine and re-key to hit the target unlock time"""
+        if target_ms is None:
+            target_ms = int(self._get_setting('kdf_target_ms', DEFAULT_TARGET_MS))
+        if algorithm is None:
+            current = self.get_kdf_params()
+            algorithm = current['algorithm'] if current else 'pbkdf2-sha256'
+        
+        kdf_params = calibrate_kdf_params(algorithm, target_ms)
+        if not self.update_kdf_params(password, kdf_params):
             return False
+        
+        with self.db.transaction() as conn:
+            self._set_setting(conn, 'kdf_target_ms', str(target_ms))
+        return True
     
     def add_password(self, title, username, password, website="", notes="", category_id=None):
         """Add new password"""
         try:
             encrypted_password = self.crypto.encrypt(password)
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO passwords (title, username, encrypted_password, website, notes, category_id)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (title, username, encrypted_password, website, notes, category_id))
-            conn.commit()
-            conn.close()
+            with self.db.transaction() as conn:
+                cursor = conn.execute('''
+                    INSERT INTO passwords (title, username, encrypted_password, website, website_host, notes, category_id)
+                    VALUES (?, ?, ?, ?, ?, ?, ?)
+                ''', (title, username, encrypted_password, website, website_host(website), notes, category_id))
+                password_id = cursor.lastrowid
+            self._invalidate_caches()
+            self._notify_password(PASSWORD_INSERTED, password_id)
             return True
         except Exception as e:
             print(f"Error adding password: {e}")
             return False
     
+    def bulk_add(self, records, batch_size=1000, commit_interval=None, progress_callback=None):
+        """Add many passwords in batched transactions
+        
+        ``records`` is any iterable of dicts with ``title``, ``password`` and
+        optionally ``username``, ``website``, ``notes`` and ``category_id``
+        or ``category`` (a name; missing categories are created). Records are
+        consumed lazily and inserted with executemany per ``batch_size``.
+        Everything is one transaction unless ``commit_interval`` is given, in
+        which case a commit happens roughly every ``commit_interval`` rows.
+        ``progress_callback(done, total)`` is called after every batch.
+        
+        Returns a dict with the number of ``added`` rows and a list of
+        ``errors`` as (record index, message) tuples.
+        """
+        total = len(records) if hasattr(records, '__len__') else None
+        added = 0
+        errors = []
+        
+        try:
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT name, id FROM categories")
+                category_ids = dict(cursor.fetchall())
+                known_ids = set(category_ids.values())
+                
+                def category_for(record):
+                    if record.get('category_id') is not None:
+                        # Checked here: a foreign key error would abort the batch
+                        if record['category_id'] not in known_ids:
+                            raise ValueError(f"Unknown category id {record['category_id']}")
+                        return record['category_id']
+                    name = (record.get('category') or '').strip()
+                    if not name:
+                        return None
+                    if name not in category_ids:
+                        cursor.execute("INSERT INTO categories (name) VALUES (?)", (name,))
+                        category_ids[name] = cursor.lastrowid
+                        known_ids.add(cursor.lastrowid)
+                    return category_ids[name]
+                
+                batch = []
+                pending = 0
+                done = 0
+                
+                def flush():
+                    conn.executemany('''
+                        INSERT INTO passwords (title, username, encrypted_password, website, website_host, notes, category_id)
+                        VALUES (?, ?, ?, ?, ?, ?, ?)
+                    ''', batch)
+                    batch.clear()
+                
+                try:
+                    for index, record in enumerate(records):
+                        done += 1
+                        try:
+                            title = (record.get('title') or '').strip()
+                            if not title:
+                                raise ValueError("Missing title")
+                            if not record.get('password'):
+                                raise ValueError("Missing password")
+                            
+                            website = record.get('website') or ''
+                            batch.append((
+                                title,
+                                record.get('username') or '',
+                                self.crypto.encrypt(record['password']),
+                                website,
+                                website_host(website),
+                                record.get('notes') or '',
+                                category_for(record)
+                            ))
+                        except VaultLockedError:
+                            raise
+                        except Exception as e:
+                            errors.append((index, str(e)))
+                            continue
+                        
+                        if len(batch) >= batch_size:
+                            pending += len(batch)
+                            flush()
+                            if commit_interval and pending >= commit_interval:
+                                conn.commit()
+                                added += pending
+                                pending = 0
+                            if progress_callback:
+                                progress_callback(done, total)
+                    
+                    if batch:
+                        pending += len(batch)
+                        flush()
+                    conn.commit()
+                    added += pending
+                    if progress_callback:
+                        progress_callback(done, total)
+                except BaseException:
+                    # Batches that were already committed stay in the vault
+                    conn.rollback()
+                    raise
+        except Exception as e:
+            print(f"Error importing passwords: {e}")
+            errors.append((None, str(e)))
+        finally:
+            # Missing categories may have been created
+            self._invalidate_caches(categories=True)
+            if added:
+                self.changes.emit(ChangeEvent(PASSWORDS_RELOADED))
+        
+        return {'added': added, 'errors': errors}
+    
     def update_password(self, password_id, title, username, password, website="", notes="", category_id=None):
         """Update existing password"""
         try:
             encrypted_password = self.crypto.encrypt(password)
             
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE passwords 
-                SET title=?, username=?, encrypted_password=?, website=?, notes=?, category_id=?, updated_at=CURRENT_TIMESTAMP
-                WHERE id=?
-            ''', (title, username, encrypted_password, website, notes, category_id, password_id))
-            conn.commit()
-            conn.close()
+            with self.db.transaction() as conn:
+                previous = conn.execute(
+                    "SELECT category_id FROM passwords WHERE id = ?", (password_id,)
+                ).fetchone()
+                conn.execute('''
+                    UPDATE passwords
+                    SET title=?, username=?, encrypted_password=?, website=?, website_host=?, notes=?, category_id=?,
+                        updated_at=CURRENT_TIMESTAMP
+                    WHERE id=?
+                ''', (title, username, encrypted_password, website, website_host(website), notes, category_id, password_id))
+            self.secret_cache.discard(int(password_id))
+            self._invalidate_caches()
+            if previous is not None:
+                self._notify_password(PASSWORD_UPDATED, password_id, previous[0])
             return True
         except Exception as e:
             print(f"Error updating password: {e}")
             return False
     
-    def get_all_passwords(self):
-        """Get all passwords"""
+    # Columns selected for list and search queries, see _row_to_record
+    RECORD_COLUMNS = '''
+        p.id, p.title, p.username, p.encrypted_password, p.website, p.notes,
+        c.name as category_name, p.category_id, p.created_at, p.updated_at
+    '''
+    
+    def _row_to_record(self, row):
+        """Build a lightweight record; the password stays encrypted"""
+        return PasswordRecord({
+            'id': row[0],
+            'title': row[1],
+            'username': row[2],
+            'website': row[4],
+            'notes': row[5],
+            'category': row[6],
+            'category_id': row[7],
+            'created_at': row[8],
+            'updated_at': row[9]
+        }, row[3], self.crypto)
+    
+    def get_all_passwords(self, category_id=None):
+        """Get all passwords, or those of a category and its subcategories
+        
+        The passwords are not decrypted.
+        """
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT p.id, p.title, p.username, p.encrypted_password, p.website, p.notes, 
-                       c.name as category_name, p.created_at, p.updated_at
-                FROM passwords p
-                LEFT JOIN categories c ON p.category_id = c.id
-                ORDER BY p.title
-            ''')
-            passwords = cursor.fetchall()
-            conn.close()
+            clauses, params = self._password_filter(category_id)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
             
-            # Convert to list of dictionaries and decrypt passwords
-            decrypted_passwords = []
-            for pwd in passwords:
-                try:
-                    decrypted_password = self.crypto.decrypt(pwd[3])
-                except:
-                    decrypted_password = "***ENCRYPTED***"
-                
-                decrypted_passwords.append({
-                    'id': pwd[0],
-                    'title': pwd[1],
-                    'username': pwd[2],
-                    'password': decrypted_password,
-                    'website': pwd[4],
-                    'notes': pwd[5],
-                    'category': pwd[6],
-                    'created_at': pwd[7],
-                    'updated_at': pwd[8]
-                })
-            
-            return decrypted_passwords
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {self.RECORD_COLUMNS}
+                    FROM passwords p
+                    LEFT JOIN categories c ON p.category_id = c.id
+                    {where}
+                    ORDER BY p.title COLLATE NOCASE, p.id
+                ''', params)
+                return [self._row_to_record(row) for row in cursor.fetchall()]
         except Exception as e:
             print(f"Error getting passwords: {e}")
             return []
     
-    def get_password_by_id(self, password_id):
-        """Get password by ID"""
-        try:
-            conn = sqlite3.connect(self.db_path)
+    def get_password_record(self, password_id):
+        """Get one password as a lightweight record (not decrypted)"""
+        with self.db.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT p.id, p.title, p.username, p.encrypted_password, p.website, p.notes, 
-                       c.name as category_name
+            cursor.execute(f'''
+                SELECT {self.RECORD_COLUMNS}
                 FROM passwords p
                 LEFT JOIN categories c ON p.category_id = c.id
                 WHERE p.id = ?
             ''', (password_id,))
-            result = cursor.fetchone()
-            conn.close()
+            row = cursor.fetchone()
+        return self._row_to_record(row) if row else None
+    
+    def _notify_password(self, kind, password_id, previous_category_id=None):
+        """Emit a change event for one password (after its commit)"""
+        if not self.changes.has_listeners:
+            return
+        
+        try:
+            if kind == PASSWORD_DELETED:
+                event = ChangeEvent(kind, password_id, category_id=previous_category_id)
+            else:
+                record = self.get_password_record(password_id)
+                if record is None:
+                    return
+                event = ChangeEvent(
+                    kind, password_id, record, record['category_id'], previous_category_id
+                )
+        except Exception as e:
+            print(f"Error building change event: {e}")
+            return
+        self.changes.emit(event)
+    
+    def get_password_by_id(self, password_id, updated_at=None):
+        """Get password by ID
+        
+        Decrypted entries are served from the short-lived secret cache;
+        pass the record's ``updated_at`` to skip a cached older version.
+        """
+        password_id = int(password_id)
+        cached = self.secret_cache.get(password_id, updated_at)
+        if cached is not None:
+            return cached
+        cache_epoch = self.secret_cache.epoch
+        
+        try:
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT p.id, p.title, p.username, p.encrypted_password, p.website, p.notes,
+                           c.name as category_name, p.updated_at
+                    FROM passwords p
+                    LEFT JOIN categories c ON p.category_id = c.id
+                    WHERE p.id = ?
+                ''', (password_id,))
+                result = cursor.fetchone()
             
             if result:
-                try:
-                    decrypted_password = self.crypto.decrypt(result[3])
-                except:
-                    decrypted_password = "***ENCRYPTED***"
+                decrypted_password, decrypt_error = self.crypto.try_decrypt(result[3])
+                if decrypt_error is None and self.crypto.needs_migration(result[3]):
+                    self._migrate_ciphertext(result[0], result[3], decrypted_password)
                 
-                return {
+                password = {
                     'id': result[0],
                     'title': result[1],
                     'username': result[2],
                     'password': decrypted_password,
+                    'decrypt_error': decrypt_error,
                     'website': result[4],
                     'notes': result[5],
-                    'category': result[6]
+                    'category': result[6],
+                    'updated_at': result[7]
                 }
+                if decrypt_error is None:
+                    self.secret_cache.put(password_id, password, cache_epoch)
+                return password
             return None
         except Exception as e:
             print(f"Error getting password: {e}")
             return None
     
+    def _migrate_ciphertext(self, password_id, encrypted_password, plaintext):
+        """Re-encrypt a value stored with an older cipher (lazy migration)"""
+        try:
+            with self.db.transaction() as conn:
+                # Skip when the row was changed in the meantime
+                conn.execute(
+                    "UPDATE passwords SET encrypted_password = ? WHERE id = ? AND encrypted_password = ?",
+                    (self.crypto.encrypt(plaintext), password_id, encrypted_password)
+                )
+        except Exception as e:
+            print(f"Error migrating password encryption: {e}")
+    
+    def decrypt_records(self, records):
+        """Decrypt the passwords of many records at once
+        
+        Returns (plaintext, error) tuples in the order of ``records``; a
+        value that cannot be decrypted gets an error instead of raising.
+        """
+        return self.crypto.decrypt_many([record.encrypted_password for record in records])
+    
     def delete_password(self, password_id):
         """Delete password by ID"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("DELETE FROM passwords WHERE id = ?", (password_id,))
-            conn.commit()
-            success = cursor.rowcount > 0
-            conn.close()
+            with self.db.transaction() as conn:
+                previous = conn.execute(
+                    "SELECT category_id FROM passwords WHERE id = ?", (password_id,)
+                ).fetchone()
+                cursor = conn.execute("DELETE FROM passwords WHERE id = ?", (password_id,))
+                success = cursor.rowcount > 0
+            self.secret_cache.discard(int(password_id))
+            self._invalidate_caches()
+            if success:
+                self._notify_password(PASSWORD_DELETED, password_id, previous[0])
             return success
         except Exception as e:
             print(f"Error deleting password: {e}")
@@ -247,14 +672,17 @@ class PasswordManager:
     def add_category(self, name, parent_id=None):
         """Add new category"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute(
-                "INSERT INTO categories (name, parent_id) VALUES (?, ?)",
-                (name, parent_id)
-            )
-            conn.commit()
-            conn.close()
+            with self.db.transaction() as conn:
+                cursor = conn.execute(
+                    "INSERT INTO categories (name, parent_id) VALUES (?, ?)",
+                    (name, parent_id)
+                )
+                category_id = cursor.lastrowid
+            self._invalidate_caches(categories=True)
+            self.changes.emit(ChangeEvent(
+                CATEGORY_ADDED, category_id,
+                {'id': category_id, 'name': name, 'parent_id': parent_id}
+            ))
             return True
         except Exception as e:
             print(f"Error adding category: {e}")
@@ -263,11 +691,10 @@ class PasswordManager:
     def get_all_categories_flat(self):
         """Get all categories as flat list"""
         try:
-            conn = sqlite3.connect(self.db_path)
-            cursor = conn.cursor()
-            cursor.execute("SELECT id, name, parent_id FROM categories ORDER BY name")
-            categories = cursor.fetchall()
-            conn.close()
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT id, name, parent_id FROM categories ORDER BY name")
+                categories = cursor.fetchall()
             
             # Convert to list of dictionaries
             return [{'id': cat[0], 'name': cat[1], 'parent_id': cat[2]} for cat in categories]
@@ -276,58 +703,325 @@ class PasswordManager:
             return []
     
     def get_category_tree(self):
-        """Get categories as hierarchical tree"""
-        flat_categories = self.get_all_categories_flat()
-        return self._build_category_tree(flat_categories)
+        """Get categories as hierarchical tree (cached until a category write)
+        
+        The cached tree is shared between callers; treat it as read-only.
+        """
+        tree = self._category_tree_cache
+        if tree is not None:
+            return tree
+        
+        generation = self._cache_generation
+        tree = self._build_category_tree(self.get_all_categories_flat())
+        if generation == self._cache_generation:
+            self._category_tree_cache = tree
+        return tree
+    
+    def get_category_counts(self):
+        """Get password counts per category (cached until the next write)
+        
+        Returns {category id: {'direct': n, 'total': n}} where ``total``
+        includes all subcategories; the None key holds uncategorized
+        entries. One grouped COUNT query is rolled up over the cached tree.
+        """
+        counts = self._category_counts_cache
+        if counts is not None:
+            return counts
+        
+        generation = self._cache_generation
+        try:
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute("SELECT category_id, COUNT(*) FROM passwords GROUP BY category_id")
+                direct = dict(cursor.fetchall())
+        except Exception as e:
+            print(f"Error counting passwords per category: {e}")
+            return {}
+        
+        uncategorized = direct.pop(None, 0)
+        counts = {None: {'direct': uncategorized, 'total': uncategorized}}
+        
+        # Post-order walk: children are totalled before their parent
+        stack = [(node, False) for node in self.get_category_tree()]
+        while stack:
+            node, children_done = stack.pop()
+            if not children_done:
+                stack.append((node, True))
+                stack.extend((child, False) for child in node['children'])
+                continue
+            count = direct.get(node['id'], 0)
+            counts[node['id']] = {
+                'direct': count,
+                'total': count + sum(counts[child['id']]['total'] for child in node['children'])
+            }
+        
+        if generation == self._cache_generation:
+            self._category_counts_cache = counts
+        return counts
     
-    def _build_category_tree(self, categories, parent_id=None):
-        """Build hierarchical category tree"""
+    @staticmethod
+    def _build_category_tree(categories):
+        """Build hierarchical category tree in one pass
+        
+        Nodes are copies with a ``children`` list; the input is not changed.
+        Categories whose parent does not exist are placed at the root.
+        """
+        nodes = {category['id']: dict(category, children=[]) for category in categories}
         tree = []
-        for category in categories:
-            if category['parent_id'] == parent_id:
-                children = self._build_category_tree(categories, category['id'])
-                category['children'] = children
-                tree.append(category)
+        for node in nodes.values():
+            parent = nodes.get(node['parent_id'])
+            if parent is None or parent is node:
+                tree.append(node)
+            else:
+                parent['children'].append(node)
         return tree
     
+    @staticmethod
+    def _fts_query(query):
+        """Turn free text into an FTS5 prefix query ("term"* AND ...)
+        
+        Terms are tokenized like the index (search_tokens), which is also
+        what the in-memory FilterEngine matches against; terms without
+        letters or digits are dropped.
+        """
+        phrases = [' '.join(search_tokens(term)) for term in query.split()]
+        return ' '.join(f'"{phrase}"*' for phrase in phrases if phrase)
+    
     def search_passwords(self, query):
-        """Search passwords by title, username, website, or notes"""
+        """Search passwords by title, username, website, notes or category"""
+        fts_query = self._fts_query(query)
+        if not fts_query:
+            return self.get_all_passwords()
+        
+        if self.fts_enabled:
+            try:
+                with self.db.connection() as conn:
+                    cursor = conn.cursor()
+                    cursor.execute(f'''
+                        SELECT {self.RECORD_COLUMNS}
+                        FROM passwords_fts f
+                        JOIN passwords p ON p.id = f.rowid
+                        LEFT JOIN categories c ON p.category_id = c.id
+                        WHERE passwords_fts MATCH ?
+                        ORDER BY bm25(passwords_fts, 10.0, 5.0, 5.0, 1.0, 2.0), p.title
+                    ''', (fts_query,))
+                    return [self._row_to_record(row) for row in cursor.fetchall()]
+            except sqlite3.OperationalError as e:
+                print(f"Full-text search failed, using LIKE search: {e}")
+        
+        return self._search_passwords_like(query)
+    
+    def _search_passwords_like(self, query):
+        """Search with LIKE scans (used when FTS5 is unavailable)"""
         try:
-            conn = sqlite3.connect(self.db_path)
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {self.RECORD_COLUMNS}
+                    FROM passwords p
+                    LEFT JOIN categories c ON p.category_id = c.id
+                    WHERE p.title LIKE ? OR p.username LIKE ? OR p.website LIKE ? OR p.notes LIKE ?
+                    ORDER BY p.title COLLATE NOCASE, p.id
+                ''', (f'%{query}%', f'%{query}%', f'%{query}%', f'%{query}%'))
+                return [self._row_to_record(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error searching passwords: {e}")
+            return []
+    
+    # Ids of a category and all of its descendants
+    CATEGORY_SUBTREE = "SELECT descendant_id FROM category_closure WHERE ancestor_id = ?"
+    
+    def _password_filter(self, category_id=None, query=None):
+        """Build WHERE clauses and parameters for list queries
+        
+        A ``category_id`` matches that category and all its subcategories.
+        For a category without subcategories the clause is an equality, so
+        idx_passwords_category_title returns its rows in title order; a
+        subtree spans several index ranges and is sorted in a temp B-tree.
+        """
+        clauses = []
+        params = []
+        
+        if category_id is not None:
+            with self.db.connection() as conn:
+                cursor = conn.execute(f"{self.CATEGORY_SUBTREE} LIMIT 2", (category_id,))
+                has_subcategories = len(cursor.fetchall()) > 1
+            if has_subcategories:
+                clauses.append(f"p.category_id IN ({self.CATEGORY_SUBTREE})")
+            else:
+                clauses.append("p.category_id = ?")
+            params.append(category_id)
+        
+        fts_query = self._fts_query(query) if query else ''
+        if fts_query and self.fts_enabled:
+            clauses.append("p.id IN (SELECT rowid FROM passwords_fts WHERE passwords_fts MATCH ?)")
+            params.append(fts_query)
+        elif fts_query:
+            clauses.append("(p.title LIKE ? OR p.username LIKE ? OR p.website LIKE ? OR p.notes LIKE ?)")
+            params.extend([f'%{query}%'] * 4)
+        
+        return clauses, params
+    
+    def get_passwords_page(self, after=None, limit=100, category_id=None, query=None, offset=0):
+        """Get one page of passwords ordered by (title, id)
+        
+        ``after`` is the ``next_cursor`` of the previous page; ``offset``
+        skips rows past that cursor (for jumps). Returns a dict with the page
+        ``items`` and the ``next_cursor`` (None on the last page). Errors
+        are printed and give an empty page; see _query_passwords_page.
+        """
+        try:
+            return self._query_passwords_page(after, limit, category_id, query, offset)
+        except Exception as e:
+            print(f"Error getting password page: {e}")
+            return {'items': [], 'next_cursor': None}
+    
+    def _query_passwords_page(self, after=None, limit=100, category_id=None, query=None, offset=0):
+        """get_passwords_page that raises on errors (for callers that must not stop early)"""
+        clauses, params = self._password_filter(category_id, query)
+        if after is not None:
+            # Collation on the parameter side keeps this a range seek on the title indexes
+            clauses.append("(p.title, p.id) > (? COLLATE NOCASE, ?)")
+            params.extend(after)
+        where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+        
+        with self.db.connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT p.id, p.title, p.username, p.encrypted_password, p.website, p.notes, 
-                       c.name as category_name
+            cursor.execute(f'''
+                SELECT {self.RECORD_COLUMNS}
                 FROM passwords p
                 LEFT JOIN categories c ON p.category_id = c.id
-                WHERE p.title LIKE ? OR p.username LIKE ? OR p.website LIKE ? OR p.notes LIKE ?
-                ORDER BY p.title
-            ''', (f'%{query}%', f'%{query}%', f'%{query}%', f'%{query}%'))
-            passwords = cursor.fetchall()
-            conn.close()
-            
-            # Convert to list of dictionaries and decrypt passwords
-            decrypted_passwords = []
-            for pwd in passwords:
-                try:
-                    decrypted_password = self.crypto.decrypt(pwd[3])
-                except:
-                    decrypted_password = "***ENCRYPTED***"
-                
-                decrypted_passwords.append({
-                    'id': pwd[0],
-                    'title': pwd[1],
-                    'username': pwd[2],
-                    'password': decrypted_password,
-                    'website': pwd[4],
-                    'notes': pwd[5],
-                    'category': pwd[6]
-                })
+                {where}
+                ORDER BY p.title COLLATE NOCASE, p.id
+                LIMIT ? OFFSET ?
+            ''', params + [limit + 1, offset])
+            rows = cursor.fetchall()
+        
+        items = [self._row_to_record(row) for row in rows[:limit]]
+        next_cursor = None
+        if len(rows) > limit:
+            next_cursor = (items[-1]['title'], items[-1]['id'])
+        return {'items': items, 'next_cursor': next_cursor}
+    
+    def count_passwords(self, category_id=None, query=None):
+        """Count passwords matching the given filters"""
+        try:
+            clauses, params = self._password_filter(category_id, query)
+            where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
             
-            return decrypted_passwords
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f"SELECT COUNT(*) FROM passwords p {where}", params)
+                return cursor.fetchone()[0]
         except Exception as e:
-            print(f"Error searching passwords: {e}")
+            print(f"Error counting passwords: {e}")
+            return 0
+    
+    def get_recently_updated(self, limit=20):
+        """Get the most recently changed passwords (without decrypting them)"""
+        try:
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {self.RECORD_COLUMNS}
+                    FROM passwords p
+                    LEFT JOIN categories c ON p.category_id = c.id
+                    ORDER BY p.updated_at DESC
+                    LIMIT ?
+                ''', (limit,))
+                return [self._row_to_record(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error getting recent passwords: {e}")
+            return []
+    
+    def find_by_website(self, website):
+        """Get the passwords stored for the host of a URL (without decrypting them)"""
+        host = website_host(website)
+        if host is None:
             return []
+        
+        try:
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute(f'''
+                    SELECT {self.RECORD_COLUMNS}
+                    FROM passwords p
+                    LEFT JOIN categories c ON p.category_id = c.id
+                    WHERE p.website_host = ?
+                    ORDER BY p.title COLLATE NOCASE, p.id
+                ''', (host,))
+                return [self._row_to_record(row) for row in cursor.fetchall()]
+        except Exception as e:
+            print(f"Error finding passwords by website: {e}")
+            return []
+    
+    # Age thresholds used by get_stats
+    RECENT_DAYS = 30
+    STALE_DAYS = 365
+    
+    def get_stats(self):
+        """Get vault statistics from COUNT queries (cached until the next write)
+        
+        Returns a dict with ``total``, ``categories``, ``recently_updated``
+        (changed in the last RECENT_DAYS days), ``stale`` (not changed for
+        STALE_DAYS days) and ``per_category`` ({category name: count}, None
+        for uncategorized entries). Nothing is decrypted.
+        """
+        stats = self._stats_cache
+        if stats is not None:
+            return dict(stats)
+        
+        generation = self._cache_generation
+        try:
+            with self.db.connection() as conn:
+                cursor = conn.cursor()
+                # Range counts on idx_passwords_updated_at instead of a table scan
+                cursor.execute('''
+                    SELECT (SELECT COUNT(*) FROM passwords),
+                           (SELECT COUNT(*) FROM passwords WHERE updated_at >= datetime('now', ?)),
+                           (SELECT COUNT(*) FROM passwords WHERE updated_at < datetime('now', ?))
+                ''', (f'-{self.RECENT_DAYS} days', f'-{self.STALE_DAYS} days'))
+                total, recently_updated, stale = cursor.fetchone()
+                
+                cursor.execute("SELECT COUNT(*) FROM categories")
+                category_count = cursor.fetchone()[0]
+                
+                cursor.execute('''
+                    SELECT c.name, COUNT(*)
+                    FROM passwords p
+                    LEFT JOIN categories c ON p.category_id = c.id
+                    GROUP BY p.category_id
+                ''')
+                per_category = dict(cursor.fetchall())
+        except Exception as e:
+            print(f"Error getting statistics: {e}")
+            return None
+        
+        stats = {
+            'total': total,
+            'categories': category_count,
+            'recently_updated': recently_updated,
+            'stale': stale,
+            'per_category': per_category
+        }
+        # Only cache when no write happened while counting
+        if generation == self._cache_generation:
+            self._stats_cache = stats
+        return dict(stats)
+    
+    def iter_passwords(self, category_id=None, query=None, batch_size=500):
+        """Yield password records lazily, one page at a time
+        
+        A failing page query raises instead of ending the iteration, so
+        exports and import deduplication never see a partial vault.
+        """
+        cursor = None
+        while True:
+            page = self._query_passwords_page(cursor, batch_size, category_id, query)
+            yield from page['items']
+            cursor = page['next_cursor']
+            if cursor is None:
+                return
 
 # Voor backward compatibility
 PasswordManagerCore = PasswordManager
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""
+Lightweight password records returned by list and search queries
+"""
+
+import re
+import unicodedata
+from urllib.parse import urlparse
+
+# Token characters of the FTS5 unicode61 tokenizer: letters and digits
+TOKEN_PATTERN = re.compile(r'[^\W_]+')
+
+def search_tokens(text):
+    """Split text into search tokens the way the FTS index does
+    
+    Lowercased, diacritics removed and split on everything that is not a
+    letter or digit (unicode61 with remove_diacritics 2). A query term
+    matches when its tokens appear in this order, the last as a prefix.
+    """
+    text = unicodedata.normalize('NFD', (text or '').lower())
+    text = ''.join(char for char in text if not unicodedata.combining(char))
+    return TOKEN_PATTERN.findall(text)
+
+def website_host(website):
+    """Normalised host of a website field ("https://www.Example.com/x" -> "example.com")"""
+    website = (website or '').strip()
+    if not website:
+        return None
+    try:
+        host = urlparse(website if '://' in website else f'//{website}').hostname
+    except ValueError:
+        return None
+    if host and host.startswith('www.'):
+        host = host[4:]
+    return host or None
+
+class PasswordRecord(dict):
+    """Password entry without its decrypted secret
+    
+    Behaves like the plain dicts used by the GUI (title, username, website,
+    category, ...). The ciphertext is kept out of the mapping and is only
+    decrypted when ``decrypt_password()`` is called, e.g. for copy or view.
+    """
+    
+    __slots__ = ('_encrypted_password', '_crypto')
+    
+    def __init__(self, fields, encrypted_password, crypto):
+        super().__init__(fields)
+        self._encrypted_password = encrypted_password
+        self._crypto = crypto
+    
+    def decrypt_password(self):
+        """Decrypt and return the password for this entry"""
+        return self._crypto.decrypt(self._encrypted_password)
+    
+    @property
+    def encrypted_password(self):
+        """The stored ciphertext (for batch decryption)"""
+        return self._encrypted_password
\ No newline at end of file
@@ -0,0 +1,152 @@
+"""
+Short-lived cache of decrypted password entries
+"""
+
+import threading
+import time
+from collections import OrderedDict
+
+DEFAULT_MAX_ENTRIES = 64
+DEFAULT_TTL_SECONDS = 60
+
+class SecretCache:
+    """Bounded LRU cache of decrypted entries with a time to live
+    
+    Entries are keyed by password id and remember the ``updated_at`` of
+    the row they were read from. The secret itself is kept in a bytearray
+    that is overwritten with zeros when the entry is evicted, expires or
+    the cache is cleared. Expired entries are purged on every access and
+    by a daemon timer armed for the earliest expiry, so an idle cache does
+    not keep them. Python may still hold copies of the str handed out by
+    ``get``; the wipe limits how long the cache itself keeps them.
+    """
+    
+    def __init__(self, max_entries=DEFAULT_MAX_ENTRIES, ttl=DEFAULT_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.epoch = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._timer = None
+    
+    @staticmethod
+    def _wipe(entry):
+        """Overwrite the secret of an entry"""
+        secret = entry['secret']
+        secret[:] = bytes(len(secret))
+    
+    def _drop(self, password_id, evicted=True):
+        """Remove and wipe one entry (lock held)"""
+        entry = self._entries.pop(password_id, None)
+        if entry is not None:
+            self._wipe(entry)
+            if evicted:
+                self.evictions += 1
+    
+    def _purge_expired(self):
+        """Wipe all expired entries (lock held)"""
+        now = time.monotonic()
+        for password_id in [key for key, entry in self._entries.items() if entry['expires'] <= now]:
+            self._drop(password_id)
+    
+    def _schedule_purge(self):
+        """Arm the purge timer for the earliest expiry (lock held)"""
+        if self._timer is not None or not self._entries:
+            return
+        expires = min(entry['expires'] for entry in self._entries.values())
+        self._timer = threading.Timer(max(expires - time.monotonic(), 0) + 0.01, self._on_timer)
+        self._timer.daemon = True
+        self._timer.start()
+    
+    def _cancel_timer(self):
+        """Stop the purge timer (lock held)"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+    
+    def _on_timer(self):
+        """Purge expired entries and re-arm for the remaining ones"""
+        with self._lock:
+            self._timer = None
+            self._purge_expired()
+            self._schedule_purge()
+    
+    def get(self, password_id, updated_at=None):
+        """Get a cached entry as a new dict, or None
+        
+        When ``updated_at`` is given, an entry read from another version
+        of the row counts as a miss and is dropped.
+        """
+        with self._lock:
+            self._purge_expired()
+            entry = self._entries.get(password_id)
+            if entry is not None and updated_at is not None and entry['fields']['updated_at'] != updated_at:
+                self._drop(password_id)
+                entry = None
+            
+            if entry is None:
+                self.misses += 1
+                return None
+            
+            self._entries.move_to_end(password_id)
+            self.hits += 1
+            result = dict(entry['fields'])
+            result['password'] = entry['secret'].decode()
+            return result
+    
+    def put(self, password_id, password, epoch=None):
+        """Cache a decrypted entry (a dict with a 'password' and 'updated_at')
+        
+        Pass the ``epoch`` read before decrypting: entries decrypted before
+        the last clear() (i.e. before a lock) are not stored.
+        """
+        if self.max_entries <= 0:
+            return
+        
+        fields = {key: value for key, value in password.items() if key != 'password'}
+        secret = bytearray(password['password'].encode())
+        with self._lock:
+            if epoch is not None and epoch != self.epoch:
+                secret[:] = bytes(len(secret))
+                return
+            self._purge_expired()
+            self._drop(password_id, evicted=False)
+            self._entries[password_id] = {
+                'fields': fields,
+                'secret': secret,
+                'expires': time.monotonic() + self.ttl
+            }
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))
+            self._schedule_purge()
+    
+    def discard(self, password_id):
+        """Forget one entry, e.g. after it was changed or deleted"""
+        with self._lock:
+            self._drop(password_id)
+    
+    def purge_expired(self):
+        """Wipe all expired entries"""
+        with self._lock:
+            self._purge_expired()
+    
+    def clear(self):
+        """Wipe every entry (on lock and when switching databases)"""
+        with self._lock:
+            self.epoch += 1
+            self._cancel_timer()
+            for password_id in list(self._entries):
+                self._drop(password_id)
+    
+    def stats(self):
+        """Hit, miss and eviction counters plus the current size"""
+        with self._lock:
+            return {
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+                'size': len(self._entries)
+            }
\ No newline at end of file
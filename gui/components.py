@@ -4,15 +4,59 @@ UI Components for SavePassword
 
 import tkinter as tk
 from tkinter import ttk
+import string
 import webbrowser
+from collections import OrderedDict
+
+from core.records import search_tokens
+
+# SQLite's NOCASE only folds ASCII letters; lists are ordered by (title NOCASE, id)
+NOCASE = str.maketrans(string.ascii_uppercase, string.ascii_lowercase)
+
+def sort_key(record):
+    """Position of a record in the order of PasswordManager list queries"""
+    return ((record.get('title') or '').translate(NOCASE), record['id'])
+
+def find_position(rows, key):
+    """Index where a row with this sort key belongs in sorted rows (bisect)"""
+    low, high = 0, len(rows)
+    while low < high:
+        middle = (low + high) // 2
+        if sort_key(rows[middle]) < key:
+            low = middle + 1
+        else:
+            high = middle
+    return low
+
+def find_index(rows, record):
+    """Index of a record in sorted rows, or None"""
+    index = find_position(rows, sort_key(record))
+    if index < len(rows) and rows[index]['id'] == record['id']:
+        return index
+    # Rows that were not in query order (e.g. a title changed in place)
+    for index, row in enumerate(rows):
+        if row['id'] == record['id']:
+            return index
+    return None
 
 class CategoryExplorer:
-    """Category explorer tree view"""
+    """Category explorer tree view
+    
+    Categories are shown in their real hierarchy. Only the top level is
+    inserted up front; the children of a node are inserted the first time
+    it is expanded (until then it holds a single placeholder item).
+    """
+    
+    ALL_ITEM = "all"
     
     def __init__(self, parent, selection_callback):
         self.parent = parent
         self.selection_callback = selection_callback
         self.tree = None
+        self.categories = {}
+        self.children = {}
+        self.counts = {}
+        self.populated = set()
         self.setup_ui()
     
     def setup_ui(self):
@@ -44,8 +88,9 @@ class CategoryExplorer:
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
-        # Bind selection event
+        # Bind selection and expand events
         self.tree.bind('<<TreeviewSelect>>', self.on_tree_select)
+        self.tree.bind('<<TreeviewOpen>>', self.on_tree_open)
         
         # Buttons
         btn_frame = ttk.Frame(frame)
@@ -55,37 +100,162 @@ class CategoryExplorer:
         ttk.Button(btn_frame, text="Expand All", command=self.expand_all).pack(side=tk.LEFT, padx=2)
         ttk.Button(btn_frame, text="Collapse All", command=self.collapse_all).pack(side=tk.LEFT, padx=2)
     
-    def update_categories(self, categories):
-        """Update the category tree with new data"""
+    def update_categories(self, categories, counts=None):
+        """Update the category tree with new data
+        
+        ``counts`` is the result of PasswordManager.get_category_counts;
+        when given, each node shows the number of passwords in its subtree.
+        Expanded nodes and the selection are kept when they still exist.
+        """
+        expanded = [item for item in self.populated if self.tree.exists(item) and self.tree.item(item, 'open')]
+        selection = self.tree.selection()
+        
         self.tree.delete(*self.tree.get_children())
+        self.populated.clear()
+        self.counts = counts or {}
+        
+        # Parent -> children index in one pass; unknown parents become roots
+        self.categories = {str(category['id']): category for category in categories}
+        self.children = {}
+        for category in categories:
+            parent = str(category['parent_id'])
+            if parent not in self.categories or parent == str(category['id']):
+                parent = ''
+            self.children.setdefault(parent, []).append(category)
         
         # Add "All Categories" option
-        self.tree.insert('', 'end', text="All Categories", values=("all",))
+        all_text = "All Categories"
+        if counts:
+            all_text += f" ({sum(count['direct'] for count in counts.values())})"
+        self.tree.insert('', 'end', iid=self.ALL_ITEM, text=all_text, values=(self.ALL_ITEM,))
+        self.populate('')
         
-        # Build category tree
-        for category in categories:
-            cat_id = category['id']
-            parent_id = category['parent_id']
-            name = category['name']
-            
-            if parent_id is None:
-                # Root category
-                item_id = self.tree.insert('', 'end', text=name, values=(cat_id,))
-            else:
-                # Child category - voor nu toevoegen als root
-                item_id = self.tree.insert('', 'end', text=name, values=(cat_id,))
+        # Parents come before their children in the saved order
+        for item in sorted(expanded, key=self.depth):
+            if self.tree.exists(item):
+                self.populate(item)
+                self.tree.item(item, open=True)
+        if selection and self.tree.exists(selection[0]):
+            self.tree.selection_set(selection[0])
+            self.tree.see(selection[0])
+    
+    def depth(self, item):
+        """Number of ancestors of a category item"""
+        depth = 0
+        category = self.categories.get(item)
+        seen = set()
+        while category is not None and category['id'] not in seen:
+            seen.add(category['id'])
+            category = self.categories.get(str(category['parent_id']))
+            depth += 1
+        return depth
+    
+    def populate(self, item):
+        """Insert the child items of a node (once)"""
+        if item in self.populated:
+            return
+        self.populated.add(item)
         
-        # Auto-expand first level
-        for child in self.tree.get_children():
-            self.tree.item(child, open=True)
+        if item:
+            self.tree.delete(*self.tree.get_children(item))
+        for category in self.children.get(item, []):
+            child = str(category['id'])
+            self.tree.insert(item, 'end', iid=child, text=self.label(category), values=(category['id'],))
+            if child in self.children:
+                # Placeholder so the node shows an expand indicator
+                self.tree.insert(child, 'end', text="")
+    
+    def in_subtree(self, category_id, ancestor_id):
+        """True when a category is ancestor_id or one of its descendants"""
+        seen = set()
+        category = self.categories.get(str(category_id))
+        while category is not None and category['id'] not in seen:
+            if category['id'] == ancestor_id:
+                return True
+            seen.add(category['id'])
+            category = self.categories.get(str(category['parent_id']))
+        return False
+    
+    def adjust_count(self, category_id, delta):
+        """Add delta to the count of a category and the totals above it"""
+        if not self.counts:
+            return
+        
+        direct = self.counts.setdefault(category_id, {'direct': 0, 'total': 0})
+        direct['direct'] += delta
+        if category_id is None:
+            direct['total'] += delta
+        
+        seen = set()
+        category = self.categories.get(str(category_id))
+        while category is not None and category['id'] not in seen:
+            seen.add(category['id'])
+            self.counts.setdefault(category['id'], {'direct': 0, 'total': 0})['total'] += delta
+            item = str(category['id'])
+            if self.tree.exists(item):
+                self.tree.item(item, text=self.label(category))
+            category = self.categories.get(str(category['parent_id']))
+        
+        total = sum(count['direct'] for count in self.counts.values())
+        self.tree.item(self.ALL_ITEM, text=f"All Categories ({total})")
+    
+    def add_category(self, category):
+        """Insert a new category without rebuilding the tree"""
+        item = str(category['id'])
+        if item in self.categories:
+            return
+        self.categories[item] = category
+        if self.counts:
+            self.counts[category['id']] = {'direct': 0, 'total': 0}
+        
+        parent = str(category['parent_id'])
+        if parent not in self.categories:
+            parent = ''
+        siblings = self.children.setdefault(parent, [])
+        index = 0
+        while index < len(siblings) and siblings[index]['name'] < category['name']:
+            index += 1
+        siblings.insert(index, category)
+        
+        if parent in self.populated:
+            # The "All Categories" item comes first at the top level
+            position = index + 1 if parent == '' else index
+            self.tree.insert(parent, position, iid=item, text=self.label(category),
+                             values=(category['id'],))
+        elif len(siblings) == 1 and self.tree.exists(parent):
+            # Placeholder so the parent shows an expand indicator; a parent
+            # without an item yet gets one when its own parent is populated
+            self.tree.insert(parent, 'end', text="")
+    
+    def label(self, category):
+        """Tree text for a category, with its subtree count when known"""
+        count = self.counts.get(category['id'])
+        if count is None:
+            return category['name']
+        return f"{category['name']} ({count['total']})"
+    
+    def on_tree_open(self, event):
+        """Insert children when a node is expanded for the first time"""
+        item = self.tree.focus()
+        if item:
+            self.populate(item)
     
     def on_tree_select(self, event):
         """Handle tree selection"""
         selection = self.tree.selection()
-        if selection:
+        if selection and (selection[0] == self.ALL_ITEM or selection[0] in self.categories):
             item = selection[0]
-            category_name = self.tree.item(item, 'text')
-            self.selection_callback(category_name)
+            if item == self.ALL_ITEM:
+                self.selection_callback(None, "All Categories")
+            else:
+                category = self.categories[item]
+                self.selection_callback(category['id'], category['name'])
+    
+    def clear_selection(self):
+        """Deselect the current category"""
+        selection = self.tree.selection()
+        if selection:
+            self.tree.selection_remove(*selection)
     
     def on_search(self, event):
         """Handle search filter"""
@@ -107,8 +277,13 @@ class CategoryExplorer:
     
     def expand_all(self):
         """Expand all categories"""
-        for item in self.tree.get_children():
-            self.tree.item(item, open=True)
+        stack = list(self.tree.get_children())
+        while stack:
+            item = stack.pop()
+            if item in self.children:
+                self.populate(item)
+                self.tree.item(item, open=True)
+                stack.extend(self.tree.get_children(item))
     
     def collapse_all(self):
         """Collapse all categories"""
@@ -119,15 +294,265 @@ class CategoryExplorer:
         """Pack the main frame"""
         pass
 
+class ListRowSource:
+    """Row source backed by an in-memory list of records"""
+    
+    def __init__(self, rows):
+        self.rows = rows
+    
+    def __len__(self):
+        return len(self.rows)
+    
+    def get_rows(self, start, stop):
+        """Get the rows in the range [start, stop)"""
+        return self.rows[start:stop]
+    
+    def close(self):
+        """Nothing to cancel for in-memory rows"""
+
+class PagedPasswordSource:
+    """Row source that pulls pages from PasswordManager on demand
+    
+    The count and the pages are queried on the TaskExecutor, never on the
+    Tk thread. get_rows returns the loaded rows of a range and requests the
+    missing pages; ``on_change()`` is called when a result arrives. After
+    close() (a newer filter or reload) late results are dropped. A reload
+    passes the ``previous`` source, whose rows stay visible until the new
+    ones have arrived.
+    """
+    
+    def __init__(self, password_manager, executor, on_change, category_id=None, query=None,
+                 page_size=200, max_pages=10, previous=None):
+        self.pm = password_manager
+        self.executor = executor
+        self.on_change = on_change
+        self.category_id = category_id
+        self.query = query
+        self.page_size = page_size
+        self.max_pages = max_pages
+        self.total = previous.total if previous is not None else 0
+        self.counted = False
+        self.pages = OrderedDict()
+        self.stale_pages = dict(previous.pages) if previous is not None else {}
+        # Keyset cursor at the start of each page we have seen so far
+        self.cursors = {0: None}
+        self.loading = {}
+        self.closed = False
+        self.count_task = executor.submit(
+            password_manager.count_passwords, category_id, query, on_success=self._on_counted
+        )
+        self._request_page(0)
+    
+    def __len__(self):
+        return self.total
+    
+    def close(self):
+        """Cancel outstanding queries and ignore their results"""
+        self.closed = True
+        self.count_task.cancel()
+        for task in self.loading.values():
+            task.cancel()
+        self.loading.clear()
+    
+    def _on_counted(self, total):
+        """Store the row count (Tk thread)"""
+        if self.closed:
+            return
+        self.total = total
+        self.counted = True
+        self.on_change()
+    
+    def _request_page(self, index):
+        """Load a page on the executor unless it is already on its way"""
+        if index in self.loading:
+            return
+        # Continue from the closest known cursor before this page
+        known = max(i for i in self.cursors if i <= index)
+        self.loading[index] = self.executor.submit(
+            self.pm.get_passwords_page, self.cursors[known], self.page_size,
+            self.category_id, self.query, offset=(index - known) * self.page_size,
+            on_success=lambda page: self._on_page(index, page),
+            on_error=lambda e: self.loading.pop(index, None)
+        )
+    
+    def _on_page(self, index, page):
+        """Store a loaded page (Tk thread)"""
+        if self.closed:
+            return
+        self.loading.pop(index, None)
+        if page['next_cursor'] is not None:
+            self.cursors[index + 1] = page['next_cursor']
+        
+        self.pages[index] = page['items']
+        self.stale_pages.pop(index, None)
+        while len(self.pages) > self.max_pages:
+            self.pages.popitem(last=False)
+        self.on_change()
+    
+    def get_rows(self, start, stop):
+        """Get the loaded rows in the range [start, stop)"""
+        if self.counted:
+            stop = min(stop, self.total)
+        if start >= stop:
+            return []
+        
+        # Drop requests for pages that were scrolled past (scrollbar drags)
+        first, last = start // self.page_size - 1, (stop - 1) // self.page_size + 1
+        for index in [i for i in self.loading if not first <= i <= last]:
+            self.loading.pop(index).cancel()
+        
+        rows = []
+        while start < stop:
+            page_index, page_offset = divmod(start, self.page_size)
+            page = self.pages.get(page_index)
+            if page is None:
+                self._request_page(page_index)
+                page = self.stale_pages.get(page_index)
+                if page is None:
+                    break
+            else:
+                self.pages.move_to_end(page_index)
+            chunk = page[page_offset:page_offset + stop - start]
+            if not chunk:
+                break
+            rows.extend(chunk)
+            start += len(chunk)
+        return rows
+
+class FilterEngine:
+    """Incremental text filter for the password list
+    
+    Matches like the database search (every term is a token prefix, see
+    search_tokens), so small and paged vaults find the same entries.
+    Searchable fields are tokenized once when the data is loaded. When the
+    new query extends the previous one, only the previous matches are
+    scanned again instead of the whole list.
+    """
+    
+    SEARCH_FIELDS = ('title', 'username', 'website', 'notes', 'category')
+    
+    def __init__(self):
+        self.records = []
+        self.keys = []
+        self.by_id = {}
+        self.last_query = None
+        self.last_matches = None
+    
+    def _search_key(self, record):
+        """Space-prefixed search tokens of a record, fields kept apart"""
+        return '\0'.join(
+            ' ' + ' '.join(search_tokens(record.get(field))) for field in self.SEARCH_FIELDS
+        )
+    
+    @staticmethod
+    def _patterns(query):
+        """One substring of _search_key per query term
+        
+        ' tok1 tok2' only matches at token starts, with the last token as
+        a prefix, like an FTS prefix phrase query.
+        """
+        patterns = []
+        for term in query.split():
+            tokens = search_tokens(term)
+            if tokens:
+                patterns.append(' ' + ' '.join(tokens))
+        return patterns
+    
+    def load(self, records):
+        """Load records and pre-normalise their searchable fields"""
+        self.records = records
+        self.keys = [self._search_key(record) for record in records]
+        self.by_id = {record['id']: record for record in records}
+        self.last_query = None
+        self.last_matches = None
+    
+    def matches(self, record, query):
+        """True when a single record matches the query"""
+        key = self._search_key(record)
+        return all(pattern in key for pattern in self._patterns(query))
+    
+    def insert(self, record):
+        """Add one record at its position in list order"""
+        index = find_position(self.records, sort_key(record))
+        self.records.insert(index, record)
+        self.keys.insert(index, self._search_key(record))
+        self.by_id[record['id']] = record
+        # Match indices after the insert have shifted
+        self.last_matches = None
+    
+    def remove(self, password_id):
+        """Remove a record by id and return it (None when not loaded)"""
+        record = self.by_id.pop(password_id, None)
+        if record is None:
+            return None
+        index = find_index(self.records, record)
+        del self.records[index]
+        del self.keys[index]
+        self.last_matches = None
+        return record
+    
+    def run(self, query, chunk_size=5000):
+        """Filter in chunks
+        
+        Generator that yields between chunks so the caller can spread the
+        work over the event loop (or drop it); its return value is the list
+        of matching records.
+        """
+        patterns = self._patterns(query)
+        if self.last_matches is not None and query.startswith(self.last_query):
+            # Extended query: terms only get longer or more, so narrow down
+            candidates = self.last_matches
+        else:
+            candidates = range(len(self.records))
+        
+        matches = []
+        for start in range(0, len(candidates), chunk_size):
+            for index in candidates[start:start + chunk_size]:
+                key = self.keys[index]
+                if not all(pattern in key for pattern in patterns):
+                    continue
+                matches.append(index)
+            if start + chunk_size < len(candidates):
+                yield
+        
+        self.last_query = query
+        self.last_matches = matches
+        return [self.records[index] for index in matches]
+
 class PasswordList:
-    """Password list with filtering and actions"""
+    """Password list with filtering and actions
+    
+    The Treeview is virtual: only the visible rows (plus a small overscan)
+    exist as items. They are recycled while scrolling and filled from a
+    row source, either an in-memory list or a paged PasswordManager query.
+    Category filtering happens in the database: the in-memory list only
+    holds the passwords of the selected category.
+    """
+    
+    OVERSCAN = 5
+    FILTER_DELAY_MS = 150
     
-    def __init__(self, parent, action_callback):
+    def __init__(self, parent, action_callback, executor, activity_callback=None):
         self.parent = parent
         self.action_callback = action_callback
+        self.executor = executor
+        # Scroll and arrow key bindings return "break", so the window's
+        # bind_all activity handlers never see them; report them directly
+        self.activity_callback = activity_callback
         self.all_passwords = []
         self.filtered_passwords = []
-        self.current_filter = None
+        self.current_category_id = None
+        self.paged_pm = None
+        self.source = ListRowSource([])
+        self.offset = 0
+        self.visible_rows = 20
+        self.row_items = []
+        self.attached_items = set()
+        self.selected_id = None
+        self.filter_engine = FilterEngine()
+        self.applied_filter = ''
+        self.filter_job = None
+        self.filter_run = None
         self.setup_ui()
     
     def setup_ui(self):
@@ -168,80 +593,304 @@ class PasswordList:
         self.tree.column('website', width=150, minwidth=100)
         self.tree.column('category', width=120, minwidth=80)
         
-        # Scrollbar
-        scrollbar = ttk.Scrollbar(list_container, orient=tk.VERTICAL, command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
+        # Scrollbar drives the virtual offset, not the Treeview itself
+        self.scrollbar = ttk.Scrollbar(list_container, orient=tk.VERTICAL, command=self.on_scroll)
         
         # Pack treeview and scrollbar
         self.tree.pack(side=tk.LEFT, fill=tk.BOTH, expand=True)
-        scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
         
         # Bind events
         self.tree.bind('<Double-1>', self.on_double_click)
         self.tree.bind('<Button-3>', self.on_right_click)
+        self.tree.bind('<<TreeviewSelect>>', self.on_select)
+        self.tree.bind('<Configure>', self.on_resize)
+        self.tree.bind('<MouseWheel>', self.on_mouse_wheel)
+        self.tree.bind('<Button-4>', lambda e: self.scroll_by(-3))
+        self.tree.bind('<Button-5>', lambda e: self.scroll_by(3))
+        self.tree.bind('<Up>', lambda e: self.on_arrow_key(-1))
+        self.tree.bind('<Down>', lambda e: self.on_arrow_key(1))
+        self.tree.bind('<Prior>', lambda e: self.scroll_by(-self.visible_rows))
+        self.tree.bind('<Next>', lambda e: self.scroll_by(self.visible_rows))
+    
+    def _row_height(self):
+        """Row height of the Treeview style"""
+        try:
+            return int(ttk.Style().lookup('Treeview', 'rowheight')) or 20
+        except (tk.TclError, ValueError):
+            return 20
     
     def update_passwords(self, passwords):
         """Update the password list"""
+        self.paged_pm = None
         self.all_passwords = passwords
+        self.filter_engine.load(passwords)
         self.apply_filters()
     
+    def set_paged_source(self, password_manager):
+        """Show passwords straight from the database, one page at a time"""
+        self.paged_pm = password_manager
+        self.all_passwords = []
+        self.filter_engine.load([])
+        self.apply_filters()
+    
+    def set_source(self, source):
+        """Show rows from a row source, starting at the top"""
+        self.source.close()
+        self.source = source
+        self.offset = 0
+        self.refresh_tree()
+    
     def apply_filters(self):
         """Apply current filters to password list"""
-        self.filtered_passwords = self.all_passwords.copy()
-        
-        # Apply text filter
-        filter_text = self.filter_var.get().lower()
-        if filter_text:
-            self.filtered_passwords = [
-                pwd for pwd in self.filtered_passwords
-                if (filter_text in pwd['title'].lower() or 
-                    filter_text in (pwd.get('username', '') or '').lower() or
-                    filter_text in (pwd.get('website', '') or '').lower() or
-                    filter_text in (pwd.get('category', '') or '').lower())
-            ]
-        
-        # Apply category filter
-        if self.current_filter and self.current_filter != "All Categories":
-            self.filtered_passwords = [
-                pwd for pwd in self.filtered_passwords
-                if pwd.get('category', '') == self.current_filter
-            ]
+        self.cancel_filter_jobs()
+        filter_text = self.filter_var.get().strip()
+        self.applied_filter = filter_text
         
-        self.refresh_tree()
+        if self.paged_pm is not None:
+            # Filtering happens in the database
+            self.filtered_passwords = []
+            self.set_source(PagedPasswordSource(
+                self.paged_pm, self.executor, self.refresh_tree,
+                self.current_category_id, filter_text or None
+            ))
+            return
+        
+        self.filter_run = self.filter_engine.run(filter_text)
+        self.continue_filter()
+    
+    def continue_filter(self):
+        """Run the next chunk of the current filter run"""
+        self.filter_job = None
+        try:
+            next(self.filter_run)
+        except StopIteration as done:
+            self.filter_run = None
+            self.filtered_passwords = done.value
+            self.set_source(ListRowSource(self.filtered_passwords))
+            return
+        
+        # Give the event loop a chance to handle input between chunks
+        self.filter_job = self.tree.after(1, self.continue_filter)
+    
+    def cancel_filter_jobs(self):
+        """Cancel pending debounce timers and stale filter runs"""
+        if self.filter_job is not None:
+            self.tree.after_cancel(self.filter_job)
+            self.filter_job = None
+        if self.filter_run is not None:
+            self.filter_run.close()
+            self.filter_run = None
     
     def refresh_tree(self):
-        """Refresh the treeview with filtered passwords"""
-        # Clear existing items
-        for item in self.tree.get_children():
-            self.tree.delete(item)
+        """Fill the recycled Treeview rows for the visible window"""
+        total = len(self.source)
+        self.offset = max(0, min(self.offset, total - self.visible_rows))
+        rows = self.source.get_rows(self.offset, self.offset + self.visible_rows + self.OVERSCAN)
         
-        # Add filtered passwords
-        for pwd in self.filtered_passwords:
-            self.tree.insert('', 'end', 
+        # Create row items only when the window grows
+        while len(self.row_items) < len(rows):
+            item = self.tree.insert('', 'end')
+            self.row_items.append(item)
+            self.attached_items.add(item)
+        
+        selected_item = None
+        for index, item in enumerate(self.row_items):
+            if index >= len(rows):
+                if item in self.attached_items:
+                    self.tree.detach(item)
+                    self.attached_items.discard(item)
+                continue
+            
+            pwd = rows[index]
+            self.tree.item(item,
                            values=(
                                pwd['title'],
                                pwd.get('username', '') or '',
                                pwd.get('website', '') or '',
                                pwd.get('category', '') or 'Uncategorized'
-                           ), 
+                           ),
                            tags=(str(pwd['id']),))
+            if item not in self.attached_items:
+                self.tree.move(item, '', index)
+                self.attached_items.add(item)
+            if str(pwd['id']) == self.selected_id:
+                selected_item = item
+        
+        # Keep the selection on the same password while rows are recycled
+        if selected_item is not None:
+            self.tree.selection_set(selected_item)
+        elif self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+        
+        self.tree.yview_moveto(0)
+        if total:
+            self.scrollbar.set(self.offset / total, min(1.0, (self.offset + self.visible_rows) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+    
+    def scroll_by(self, rows):
+        """Scroll the virtual window by a number of rows"""
+        self.report_activity()
+        self.offset += rows
+        self.refresh_tree()
+        return "break"
+    
+    def report_activity(self):
+        """Tell the window about user input that a binding swallows"""
+        if self.activity_callback is not None:
+            self.activity_callback()
+    
+    def on_scroll(self, *args):
+        """Handle scrollbar commands"""
+        if args[0] == 'moveto':
+            self.offset = int(float(args[1]) * len(self.source))
+            self.refresh_tree()
+        elif args[0] == 'scroll':
+            amount = int(args[1])
+            if args[2] == 'pages':
+                amount *= self.visible_rows
+            self.scroll_by(amount)
+    
+    def on_mouse_wheel(self, event):
+        """Handle mouse wheel scrolling"""
+        if abs(event.delta) >= 120:
+            steps = -3 * (event.delta // 120)
+        else:
+            steps = -event.delta
+        return self.scroll_by(steps)
+    
+    def on_resize(self, event):
+        """Recalculate the number of visible rows"""
+        # One row height is taken by the column headings
+        visible_rows = max(1, event.height // self._row_height() - 1)
+        if visible_rows != self.visible_rows:
+            self.visible_rows = visible_rows
+            self.refresh_tree()
+    
+    def on_select(self, event):
+        """Remember the selected password across recycled rows"""
+        selection = self.tree.selection()
+        if selection:
+            tags = self.tree.item(selection[0], 'tags')
+            if tags:
+                self.selected_id = str(tags[0])
+    
+    def on_arrow_key(self, direction):
+        """Move the selection, scrolling when it leaves the visible window"""
+        self.report_activity()
+        selection = self.tree.selection()
+        if not selection or selection[0] not in self.row_items:
+            return None
+        
+        index = self.row_items.index(selection[0]) + direction
+        if 0 <= index < self.visible_rows:
+            return None
+        
+        position = self.offset + index
+        if position < 0:
+            return "break"
+        rows = self.source.get_rows(position, position + 1)
+        if rows:
+            self.selected_id = str(rows[0]['id'])
+            self.scroll_by(direction)
+        return "break"
     
     def on_filter(self, event):
-        """Handle filter text change"""
-        self.apply_filters()
+        """Handle filter text change (debounced)"""
+        if self.filter_var.get().strip() == self.applied_filter and self.filter_run is None:
+            return
+        
+        self.cancel_filter_jobs()
+        self.filter_job = self.tree.after(self.FILTER_DELAY_MS, self.apply_filters)
+    
+    def upsert_password(self, record):
+        """Insert or replace one password without reloading the list"""
+        if self.paged_pm is not None:
+            self.reload_paged_source()
+            return
+        
+        self._remove_row(record['id'])
+        self.filter_engine.insert(record)
+        if self.filter_run is not None:
+            # A chunked filter run is in progress; restart it on the new data
+            self.apply_filters()
+            return
+        
+        if self.filter_engine.matches(record, self.applied_filter):
+            self.filtered_passwords.insert(find_position(self.filtered_passwords, sort_key(record)), record)
+        self.refresh_tree()
+    
+    def remove_password(self, password_id):
+        """Remove one password without reloading the list"""
+        if self.paged_pm is not None:
+            self.reload_paged_source()
+            return
+        
+        self._remove_row(password_id)
+        if self.filter_run is not None:
+            self.apply_filters()
+            return
+        self.refresh_tree()
+    
+    def _remove_row(self, password_id):
+        """Drop a password from the loaded and the filtered rows"""
+        record = self.filter_engine.remove(password_id)
+        if record is not None:
+            index = find_index(self.filtered_passwords, record)
+            if index is not None:
+                del self.filtered_passwords[index]
+    
+    def reload_paged_source(self):
+        """Re-query the paged source, keeping the scroll position"""
+        offset = self.offset
+        previous = self.source
+        previous.close()
+        self.source = PagedPasswordSource(
+            self.paged_pm, self.executor, self.refresh_tree,
+            self.current_category_id, self.applied_filter or None, previous=previous
+        )
+        self.offset = offset
+        self.refresh_tree()
+    
+    def get_record(self, password_id):
+        """Get the loaded record of a password, or None"""
+        password_id = int(password_id)
+        record = self.filter_engine.by_id.get(password_id)
+        if record is None:
+            # Paged mode keeps no index; actions come from the visible rows
+            for row in self.source.get_rows(self.offset, self.offset + self.visible_rows + self.OVERSCAN):
+                if row['id'] == password_id:
+                    return row
+        return record
+    
+    def clear(self):
+        """Drop all loaded rows and the search text (when the vault locks)"""
+        self.cancel_filter_jobs()
+        self.paged_pm = None
+        self.all_passwords = []
+        self.filtered_passwords = []
+        self.filter_engine.load([])
+        self.selected_id = None
+        self.applied_filter = ''
+        self.filter_var.set("")
+        self.set_source(ListRowSource([]))
     
     def clear_filters(self):
-        """Clear all filters"""
+        """Clear the search filter"""
         self.filter_var.set("")
-        self.current_filter = None
         self.apply_filters()
     
-    def filter_by_category(self, category_name):
-        """Filter by category"""
-        if category_name == "All Categories":
-            self.current_filter = None
-        else:
-            self.current_filter = category_name
+    def filter_by_category(self, category_id, passwords=None):
+        """Show a category (None for all passwords)
+        
+        ``passwords`` are the rows of that category as loaded from the
+        database; in paged mode they are queried page by page instead.
+        """
+        self.current_category_id = category_id
+        if passwords is not None and self.paged_pm is None:
+            self.all_passwords = passwords
+            self.filter_engine.load(passwords)
         self.apply_filters()
     
     def on_double_click(self, event):
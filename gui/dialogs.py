@@ -9,6 +9,9 @@ import webbrowser
 import random
 import string
 
+from core.importers import FORMATS, import_file
+from core.exporter import export_vault, verify_export
+
 class DatabaseSelectionDialog:
     """Dialog for selecting or creating database"""
     
@@ -72,10 +75,11 @@ class DatabaseSelectionDialog:
 class LoginDialog:
     """Login dialog"""
     
-    def __init__(self, parent, password_manager, callback):
+    def __init__(self, parent, password_manager, callback, executor=None):
         self.parent = parent
         self.pm = password_manager
         self.callback = callback
+        self.executor = executor
         self.dialog = None
     
     def show(self):
@@ -102,7 +106,8 @@ class LoginDialog:
         btn_frame = ttk.Frame(self.dialog)
         btn_frame.pack(pady=10)
         
-        ttk.Button(btn_frame, text="Login", command=self.login).pack(side=tk.LEFT, padx=5)
+        self.login_button = ttk.Button(btn_frame, text="Login", command=self.login)
+        self.login_button.pack(side=tk.LEFT, padx=5)
         ttk.Button(btn_frame, text="Cancel", command=self.cancel).pack(side=tk.LEFT, padx=5)
         
         # Bind Enter key to login
@@ -111,10 +116,28 @@ class LoginDialog:
     def login(self):
         """Attempt login"""
         password = self.password_var.get()
-        if self.pm.verify_master_password(password):
+        if self.executor is None:
+            self.on_verified(self.pm.verify_master_password(password))
+            return
+        
+        # Key derivation is slow on purpose; keep the UI responsive
+        if str(self.login_button['state']) == tk.DISABLED:
+            return
+        self.login_button.config(state=tk.DISABLED)
+        self.executor.submit(
+            self.pm.verify_master_password, password,
+            on_success=self.on_verified,
+            on_error=lambda e: self.on_verified(False)
+        )
+    
+    def on_verified(self, success):
+        """Handle the result of the master password check"""
+        if success:
             self.dialog.destroy()
             self.callback()
         else:
+            if self.executor is not None:
+                self.login_button.config(state=tk.NORMAL)
             messagebox.showerror("Error", "Invalid master password")
     
     def cancel(self):
@@ -125,10 +148,11 @@ class LoginDialog:
 class SetupDialog:
     """Setup dialog for first use"""
     
-    def __init__(self, parent, password_manager, callback):
+    def __init__(self, parent, password_manager, callback, executor=None):
         self.parent = parent
         self.pm = password_manager
         self.callback = callback
+        self.executor = executor
         self.dialog = None
     
     def show(self):
@@ -160,7 +184,8 @@ class SetupDialog:
         btn_frame = ttk.Frame(self.dialog)
         btn_frame.pack(pady=10)
         
-        ttk.Button(btn_frame, text="Create", command=self.create).pack(side=tk.LEFT, padx=5)
+        self.create_button = ttk.Button(btn_frame, text="Create", command=self.create)
+        self.create_button.pack(side=tk.LEFT, padx=5)
         
         # Bind Enter key to create
         confirm_entry.bind('<Return>', lambda e: self.create())
@@ -182,10 +207,28 @@ class SetupDialog:
             messagebox.showerror("Error", "Password must be at least 6 characters")
             return
         
-        if self.pm.set_master_password(password):
+        if self.executor is None:
+            self.on_created(self.pm.set_master_password(password))
+            return
+        
+        # Calibrating and running the KDF takes a moment
+        if str(self.create_button['state']) == tk.DISABLED:
+            return
+        self.create_button.config(state=tk.DISABLED)
+        self.executor.submit(
+            self.pm.set_master_password, password,
+            on_success=self.on_created,
+            on_error=lambda e: self.on_created(False)
+        )
+    
+    def on_created(self, success):
+        """Handle the result of setting the master password"""
+        if success:
             self.dialog.destroy()
             self.callback()
         else:
+            if self.executor is not None:
+                self.create_button.config(state=tk.NORMAL)
             messagebox.showerror("Error", "Failed to set master password")
 
 class AddPasswordDialog:
@@ -237,7 +280,7 @@ class AddPasswordDialog:
                 show_btn.pack(side=tk.RIGHT, padx=(5, 0))
                 
                 self.entries[field_name] = entry
-                
+            
             elif field_name == "notes":
                 entry = tk.Text(self.dialog, height=4, width=40)
                 entry.pack(padx=20, pady=5, fill=tk.X)
@@ -538,7 +581,7 @@ class SettingsDialog:
             messagebox.showinfo("Success", "Settings saved successfully!")
             self.dialog.destroy()
             self.callback()
-            
+        
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save settings: {str(e)}")
     
@@ -601,7 +644,7 @@ class ViewPasswordDialog:
         details = [
             f"Title: {password['title']}",
             f"Username: {password['username'] or 'N/A'}",
-            f"Password: {password['password']}",
+            f"Password: {password['password'] if password['decrypt_error'] is None else '(cannot decrypt)'}",
             f"Website: {password['website'] or 'N/A'}",
             f"Category: {password['category'] or 'Uncategorized'}",
             f"Notes: {password['notes'] or 'N/A'}"
@@ -628,16 +671,234 @@ class EditPasswordDialog:
         ttk.Label(self.dialog, text="Edit Password - To be implemented").pack(pady=20)
         ttk.Button(self.dialog, text="Close", command=self.dialog.destroy).pack(pady=10)
 
+class ImportDialog:
+    """Dialog for importing an export from another password manager"""
+    
+    def __init__(self, parent, password_manager, callback, executor):
+        self.parent = parent
+        self.pm = password_manager
+        self.callback = callback
+        self.executor = executor
+        self.task = None
+        self.dialog = None
+    
+    def show(self):
+        """Show import dialog"""
+        self.dialog = tk.Toplevel(self.parent)
+        self.dialog.title("Import Passwords")
+        self.dialog.geometry("420x260")
+        self.dialog.transient(self.parent)
+        self.dialog.grab_set()
+        self.dialog.protocol("WM_DELETE_WINDOW", self.cancel)
+        
+        ttk.Label(self.dialog, text="File:").pack(anchor=tk.W, padx=20, pady=(10, 0))
+        file_frame = ttk.Frame(self.dialog)
+        file_frame.pack(padx=20, pady=5, fill=tk.X)
+        self.path_var = tk.StringVar()
+        ttk.Entry(file_frame, textvariable=self.path_var).pack(side=tk.LEFT, fill=tk.X, expand=True)
+        ttk.Button(file_frame, text="Browse...", command=self.browse).pack(side=tk.RIGHT, padx=(5, 0))
+        
+        ttk.Label(self.dialog, text="Format:").pack(anchor=tk.W, padx=20, pady=(10, 0))
+        self.format_names = {"Detect automatically": None}
+        self.format_names.update({label: name for name, (label, reader) in FORMATS.items()})
+        self.format_var = tk.StringVar(value="Detect automatically")
+        ttk.Combobox(
+            self.dialog, textvariable=self.format_var, state="readonly",
+            values=list(self.format_names)
+        ).pack(padx=20, pady=5, fill=tk.X)
+        
+        self.dedupe_var = tk.BooleanVar(value=True)
+        ttk.Checkbutton(self.dialog, text="Skip duplicate entries", variable=self.dedupe_var).pack(anchor=tk.W, padx=20, pady=5)
+        
+        self.progress_var = tk.StringVar()
+        ttk.Label(self.dialog, textvariable=self.progress_var).pack(anchor=tk.W, padx=20)
+        
+        btn_frame = ttk.Frame(self.dialog)
+        btn_frame.pack(pady=10)
+        self.import_button = ttk.Button(btn_frame, text="Import", command=self.start_import)
+        self.import_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Cancel", command=self.cancel).pack(side=tk.LEFT, padx=5)
+    
+    def browse(self):
+        """Choose the file to import"""
+        path = filedialog.askopenfilename(
+            parent=self.dialog, title="Select export file",
+            filetypes=[("Exports", "*.csv *.json *.xml"), ("All files", "*.*")]
+        )
+        if path:
+            self.path_var.set(path)
+    
+    def start_import(self):
+        """Run the import on a worker thread"""
+        path = self.path_var.get().strip()
+        if not path or not os.path.exists(path):
+            messagebox.showerror("Error", "Please select a file to import", parent=self.dialog)
+            return
+        
+        self.import_button.config(state=tk.DISABLED)
+        self.progress_var.set("Importing...")
+        self.task = self.executor.submit(
+            import_file, self.pm, path, self.format_names[self.format_var.get()],
+            skip_duplicates=self.dedupe_var.get(),
+            on_success=self.on_imported,
+            on_error=self.on_failed,
+            on_progress=self.on_progress
+        )
+    
+    def on_progress(self, done, total):
+        """Show how many entries have been processed"""
+        self.progress_var.set(f"Processed {done} entries...")
+    
+    def on_imported(self, result):
+        """Report the import result"""
+        self.task = None
+        message = f"Imported {result['added']} passwords"
+        if result.get('skipped'):
+            message += f", skipped {result['skipped']} duplicates"
+        if result['errors']:
+            message += f", {len(result['errors'])} entries failed"
+        
+        self.dialog.destroy()
+        messagebox.showinfo("Import", message)
+        self.callback()
+    
+    def on_failed(self, error):
+        """Report a failed import"""
+        self.task = None
+        self.import_button.config(state=tk.NORMAL)
+        self.progress_var.set("")
+        messagebox.showerror("Error", f"Import failed: {error}", parent=self.dialog)
+    
+    def cancel(self):
+        """Cancel dialog (and a running import)"""
+        # The import runs in one transaction, so nothing is kept
+        if self.task is not None:
+            self.task.cancel()
+        self.dialog.destroy()
+
 class ExportDialog:
-    def __init__(self, parent, password_manager):
+    """Dialog for exporting the vault"""
+    
+    def __init__(self, parent, password_manager, executor):
         self.parent = parent
         self.pm = password_manager
+        self.executor = executor
+        self.task = None
         self.dialog = None
     
     def show(self):
+        """Show export dialog"""
         self.dialog = tk.Toplevel(self.parent)
         self.dialog.title("Export Passwords")
-        self.dialog.geometry("400x200")
-        # Add export implementation here
-        ttk.Label(self.dialog, text="Export Passwords - To be implemented").pack(pady=20)
-        ttk.Button(self.dialog, text="Close", command=self.dialog.destroy).pack(pady=10)
\ No newline at end of file
+        self.dialog.geometry("420x320")
+        self.dialog.transient(self.parent)
+        self.dialog.grab_set()
+        self.dialog.protocol("WM_DELETE_WINDOW", self.cancel)
+        
+        ttk.Label(self.dialog, text="Format:").pack(anchor=tk.W, padx=20, pady=(10, 0))
+        self.format_var = tk.StringVar(value="encrypted")
+        for text, value in [
+            ("Encrypted export (.spx)", "encrypted"),
+            ("CSV (unencrypted)", "csv"),
+            ("JSON (unencrypted)", "json")
+        ]:
+            ttk.Radiobutton(
+                self.dialog, text=text, value=value, variable=self.format_var,
+                command=self.on_format_changed
+            ).pack(anchor=tk.W, padx=30)
+        
+        ttk.Label(self.dialog, text="Export password:").pack(anchor=tk.W, padx=20, pady=(10, 0))
+        self.password_entry = ttk.Entry(self.dialog, show="*")
+        self.password_entry.pack(padx=20, pady=5, fill=tk.X)
+        ttk.Label(self.dialog, text="Confirm password:").pack(anchor=tk.W, padx=20)
+        self.confirm_entry = ttk.Entry(self.dialog, show="*")
+        self.confirm_entry.pack(padx=20, pady=5, fill=tk.X)
+        
+        self.progress_var = tk.StringVar()
+        ttk.Label(self.dialog, textvariable=self.progress_var).pack(anchor=tk.W, padx=20)
+        
+        btn_frame = ttk.Frame(self.dialog)
+        btn_frame.pack(pady=10)
+        self.export_button = ttk.Button(btn_frame, text="Export", command=self.start_export)
+        self.export_button.pack(side=tk.LEFT, padx=5)
+        ttk.Button(btn_frame, text="Cancel", command=self.cancel).pack(side=tk.LEFT, padx=5)
+    
+    def on_format_changed(self):
+        """Only encrypted exports need a password"""
+        state = tk.NORMAL if self.format_var.get() == "encrypted" else tk.DISABLED
+        self.password_entry.config(state=state)
+        self.confirm_entry.config(state=state)
+    
+    def start_export(self):
+        """Ask for a file and run the export on a worker thread"""
+        fmt = self.format_var.get()
+        password = None
+        
+        if fmt == "encrypted":
+            password = self.password_entry.get()
+            if not password:
+                messagebox.showerror("Error", "Export password is required", parent=self.dialog)
+                return
+            if password != self.confirm_entry.get():
+                messagebox.showerror("Error", "Passwords do not match", parent=self.dialog)
+                return
+        elif not messagebox.askyesno(
+            "Warning", "Unencrypted exports contain all passwords in plain text. Continue?",
+            parent=self.dialog
+        ):
+            return
+        
+        extension = ".spx" if fmt == "encrypted" else f".{fmt}"
+        path = filedialog.asksaveasfilename(
+            parent=self.dialog, title="Export passwords",
+            defaultextension=extension,
+            filetypes=[("Export file", f"*{extension}"), ("All files", "*.*")]
+        )
+        if not path:
+            return
+        
+        self.export_button.config(state=tk.DISABLED)
+        self.progress_var.set("Exporting...")
+        self.task = self.executor.submit(
+            self.run_export, path, fmt, password,
+            on_success=self.on_exported,
+            on_error=self.on_failed,
+            on_progress=self.on_progress
+        )
+    
+    def run_export(self, path, fmt, password, progress_callback=None):
+        """Export and verify the written file (worker thread)"""
+        result = export_vault(self.pm, path, fmt, password, progress_callback=progress_callback)
+        if fmt == "encrypted":
+            result['verified'] = verify_export(path, password)
+        return result
+    
+    def on_progress(self, done, total):
+        """Show export progress"""
+        self.progress_var.set(f"Exported {done} of {total} entries...")
+    
+    def on_exported(self, result):
+        """Report the export result"""
+        self.task = None
+        message = f"Exported {result['exported']} passwords"
+        if 'verified' in result:
+            message += f" ({result['verified']['frames']} frames verified)"
+        if result['errors']:
+            message += f", {len(result['errors'])} unreadable entries skipped"
+        
+        self.dialog.destroy()
+        messagebox.showinfo("Export", message)
+    
+    def on_failed(self, error):
+        """Report a failed export"""
+        self.task = None
+        self.export_button.config(state=tk.NORMAL)
+        self.progress_var.set("")
+        messagebox.showerror("Error", f"Export failed: {error}", parent=self.dialog)
+    
+    def cancel(self):
+        """Cancel dialog (and a running export)"""
+        # A cancelled export leaves no partial file behind
+        if self.task is not None:
+            self.task.cancel()
+        self.dialog.destroy()
\ No newline at end of file
@@ -5,25 +5,45 @@ Hoofdvenster voor SavePassword GUI
 import tkinter as tk
 from tkinter import ttk, messagebox
 import os
+import time
 
 from core.password_manager import PasswordManager
-from gui.dialogs import DatabaseSelectionDialog, LoginDialog, SetupDialog, AddPasswordDialog
+from core.events import (
+    PASSWORD_INSERTED, PASSWORD_UPDATED, PASSWORD_DELETED, PASSWORDS_RELOADED, CATEGORY_ADDED
+)
+from gui.dialogs import DatabaseSelectionDialog, LoginDialog, SetupDialog, AddPasswordDialog, ImportDialog, ExportDialog
 from gui.components import CategoryExplorer, PasswordList
 from gui.themes import ThemeManager
+from gui.tasks import TaskExecutor
 from utils.settings import SettingsManager
 from utils.language_manager import LanguageManager
 
 class MainWindow:
     """Hoofdvenster klasse voor SavePassword"""
     
+    # Vaults larger than this are listed page by page from the database
+    PAGED_LIST_THRESHOLD = 5000
+    
+    # Input that counts as activity for the auto-lock timer
+    ACTIVITY_EVENTS = ('<Any-KeyPress>', '<Any-ButtonPress>', '<Motion>', '<MouseWheel>')
+    
     def __init__(self, root):
         self.root = root
         self.pm = None
+        self.current_category_id = None
+        self.refresh_task = None
+        self.category_task = None
+        self.busy_bar = None
+        self.password_list = None
+        self.lock_job = None
+        self.last_activity = time.monotonic()
+        self.executor = TaskExecutor(root, busy_callback=self.on_busy_changed)
         self.settings_manager = SettingsManager()
         self.language_manager = LanguageManager()
         self.theme_manager = ThemeManager()
         
         self.setup_window()
+        self.root.protocol("WM_DELETE_WINDOW", self.on_close)
         self.show_database_selection()
     
     def setup_window(self):
@@ -35,6 +55,10 @@ class MainWindow:
         # Apply theme
         theme = self.settings_manager.get('theme', 'light')
         self.theme_manager.apply_theme(self.root, theme)
+        
+        # Input only records a timestamp; the lock timer checks it when it fires
+        for sequence in self.ACTIVITY_EVENTS:
+            self.root.bind_all(sequence, self.on_user_activity, add='+')
     
     def show_database_selection(self):
         """Toon database selectie dialoog"""
@@ -44,6 +68,7 @@ class MainWindow:
     def on_database_selected(self, db_path):
         """Callback wanneer database is geselecteerd"""
         self.pm = PasswordManager(db_path)
+        self.pm.changes.subscribe(self.on_vault_change_threadsafe)
         self.check_master_password()
     
     def check_master_password(self):
@@ -55,12 +80,12 @@ class MainWindow:
     
     def show_login_dialog(self):
         """Toon login dialoog"""
-        dialog = LoginDialog(self.root, self.pm, self.on_login_success)
+        dialog = LoginDialog(self.root, self.pm, self.on_login_success, self.executor)
         dialog.show()
     
     def show_setup_dialog(self):
         """Toon setup dialoog"""
-        dialog = SetupDialog(self.root, self.pm, self.on_setup_complete)
+        dialog = SetupDialog(self.root, self.pm, self.on_setup_complete, self.executor)
         dialog.show()
     
     def on_login_success(self):
@@ -92,6 +117,7 @@ class MainWindow:
         
         # Load initial data
         self.refresh_ui()
+        self.start_auto_lock()
     
     def setup_top_bar(self, parent):
         """Stel de top bar in met knoppen"""
@@ -102,6 +128,8 @@ class MainWindow:
         buttons = [
             ("🔍 All", self.show_all_passwords, "#4CAF50"),
             ("➕ Add Password", self.show_add_dialog, "#2196F3"),
+            ("📥 Import", self.show_import_dialog, "#3F51B5"),
+            ("📤 Export", self.show_export_dialog, "#607D8B"),
             ("🔄 Refresh", self.refresh_ui, "#009688"),
             ("⚙️ Settings", self.show_settings, "#795548"),
             ("🔄 Switch DB", self.switch_database, "#FF5722")
@@ -159,7 +187,9 @@ class MainWindow:
         password_frame = ttk.Frame(paned_window)
         paned_window.add(password_frame, weight=3)
         
-        self.password_list = PasswordList(password_frame, self.on_password_action)
+        self.password_list = PasswordList(
+            password_frame, self.on_password_action, self.executor, self.on_user_activity
+        )
         self.password_list.pack(fill=tk.BOTH, expand=True)
     
     def setup_status_bar(self, parent):
@@ -171,35 +201,81 @@ class MainWindow:
         status_label = ttk.Label(status_frame, textvariable=self.status_var)
         status_label.pack(side=tk.LEFT)
         
+        # Busy indicator, only visible while background work is running
+        self.busy_frame = ttk.Frame(status_frame)
+        self.busy_bar = ttk.Progressbar(self.busy_frame, mode='indeterminate', length=120)
+        self.busy_bar.pack(side=tk.LEFT, padx=5)
+        ttk.Button(self.busy_frame, text="Cancel", command=self.executor.cancel_all).pack(side=tk.LEFT)
+        
         self.stats_var = tk.StringVar(value="Passwords: 0 | Categories: 0")
         stats_label = ttk.Label(status_frame, textvariable=self.stats_var)
         stats_label.pack(side=tk.RIGHT)
     
+    def on_busy_changed(self, busy):
+        """Show or hide the busy indicator in the status bar"""
+        if self.busy_bar is None or not self.busy_bar.winfo_exists():
+            return
+        
+        if busy:
+            self.busy_frame.pack(side=tk.LEFT, padx=10)
+            self.busy_bar.start(15)
+        else:
+            self.busy_bar.stop()
+            self.busy_frame.pack_forget()
+    
     def refresh_ui(self):
         """Vernieuw de UI met huidige data"""
         if not self.pm:
             return
         
-        try:
-            # Update categories
-            categories = self.pm.get_all_categories_flat()
-            self.category_explorer.update_categories(categories)
-            
-            # Update passwords - gebruik sample data als database leeg is
-            passwords = self.pm.get_all_passwords()
-            if not passwords:
-                # Voeg enkele voorbeeld wachtwoorden toe als database leeg is
-                self.add_sample_passwords()
-                passwords = self.pm.get_all_passwords()
-            
-            self.password_list.update_passwords(passwords)
-            
-            # Update statistics
-            self.update_statistics()
-            
-            self.status_var.set("Application ready")
-        except Exception as e:
-            self.status_var.set(f"Error: {str(e)}")
+        # A newer refresh supersedes one that is still running
+        if self.refresh_task is not None:
+            self.refresh_task.cancel()
+        
+        self.status_var.set("Loading passwords...")
+        self.refresh_task = self.executor.submit(
+            self.load_vault_data, self.current_category_id,
+            on_success=self.apply_vault_data,
+            on_error=lambda e: self.status_var.set(f"Error: {str(e)}")
+        )
+    
+    def load_vault_data(self, category_id=None):
+        """Laad categorieën en wachtwoorden (draait op een worker thread)"""
+        categories = self.pm.get_all_categories_flat()
+        
+        # Gebruik sample data als database leeg is
+        password_count = self.pm.count_passwords()
+        if not password_count:
+            # Voeg enkele voorbeeld wachtwoorden toe als database leeg is
+            self.add_sample_passwords()
+            password_count = self.pm.count_passwords()
+        
+        passwords = None
+        if password_count <= self.PAGED_LIST_THRESHOLD:
+            passwords = self.pm.get_all_passwords(category_id)
+        
+        return {
+            'categories': categories,
+            'counts': self.pm.get_category_counts(),
+            'passwords': passwords,
+            'category_id': category_id
+        }
+    
+    def apply_vault_data(self, data):
+        """Toon geladen data in de UI (Tk thread)"""
+        self.refresh_task = None
+        self.category_explorer.update_categories(data['categories'], data['counts'])
+        
+        if data['passwords'] is None:
+            self.password_list.set_paged_source(self.pm)
+        elif data['category_id'] == self.current_category_id:
+            self.password_list.update_passwords(data['passwords'])
+        # else: a category selected while loading arrives through category_task
+        
+        # Update statistics
+        self.update_statistics()
+        
+        self.status_var.set("Application ready")
     
     def add_sample_passwords(self):
         """Voeg voorbeeld wachtwoorden toe voor demonstratie"""
@@ -241,21 +317,83 @@ class MainWindow:
         if not self.pm:
             return
         
-        try:
-            passwords = self.pm.get_all_passwords()
-            categories = self.pm.get_all_categories_flat()
-            
-            password_count = len(passwords)
-            category_count = len(categories)
+        def show(stats):
+            if stats is None:
+                self.stats_var.set("Statistics: N/A")
+                return
+            self.stats_var.set(
+                f"Passwords: {stats['total']} | Categories: {stats['categories']} | "
+                f"Stale: {stats['stale']}"
+            )
+        
+        self.executor.submit(
+            self.pm.get_stats, on_success=show,
+            on_error=lambda e: self.stats_var.set("Statistics: N/A")
+        )
+    
+    def on_vault_change_threadsafe(self, event):
+        """Change listener; events can arrive on any thread"""
+        self.executor.call_soon(self.on_vault_change, event)
+    
+    def on_vault_change(self, event):
+        """Apply a vault change to the UI as a point update (Tk thread)"""
+        if self.pm is None or self.busy_bar is None:
+            return
+        
+        if event.kind == PASSWORDS_RELOADED:
+            self.refresh_ui()
+            return
+        
+        if event.kind == CATEGORY_ADDED:
+            self.category_explorer.add_category(event.record)
+            return
+        
+        if event.kind == PASSWORD_DELETED:
+            self.password_list.remove_password(event.id)
+            self.category_explorer.adjust_count(event.category_id, -1)
+        elif event.kind in (PASSWORD_INSERTED, PASSWORD_UPDATED):
+            if (self.current_category_id is None or
+                    self.category_explorer.in_subtree(event.category_id, self.current_category_id)):
+                self.password_list.upsert_password(event.record)
+            else:
+                # Moved out of (or added outside) the shown category
+                self.password_list.remove_password(event.id)
             
-            self.stats_var.set(f"Passwords: {password_count} | Categories: {category_count}")
-        except Exception as e:
-            self.stats_var.set("Statistics: N/A")
+            if event.kind == PASSWORD_INSERTED:
+                self.category_explorer.adjust_count(event.category_id, 1)
+            elif event.category_id != event.previous_category_id:
+                self.category_explorer.adjust_count(event.previous_category_id, -1)
+                self.category_explorer.adjust_count(event.category_id, 1)
+        
+        self.update_statistics()
     
-    def on_category_selected(self, category_name):
-        """Callback wanneer categorie is geselecteerd"""
-        self.password_list.filter_by_category(category_name)
-        self.status_var.set(f"Filtered by category: {category_name}")
+    def on_category_selected(self, category_id, category_name=None):
+        """Callback wanneer categorie is geselecteerd (None voor alle wachtwoorden)"""
+        if self.category_task is not None:
+            self.category_task.cancel()
+            self.category_task = None
+        self.current_category_id = category_id
+        
+        def show(passwords=None):
+            self.category_task = None
+            self.password_list.filter_by_category(category_id, passwords)
+            if category_id is None:
+                self.status_var.set("Showing all passwords")
+            else:
+                self.status_var.set(f"Filtered by category: {category_name}")
+        
+        if self.password_list.paged_pm is not None:
+            # Paged lists query the category page by page
+            show()
+            return
+        
+        # Fetch only the rows of this category (and its subcategories)
+        self.status_var.set("Loading passwords...")
+        self.category_task = self.executor.submit(
+            self.pm.get_all_passwords, category_id,
+            on_success=show,
+            on_error=lambda e: self.status_var.set(f"Error: {str(e)}")
+        )
     
     def on_password_action(self, action, password_id):
         """Callback voor wachtwoord acties"""
@@ -275,39 +413,64 @@ class MainWindow:
     # Dialog methods
     def show_all_passwords(self):
         """Show all passwords"""
-        self.password_list.clear_filters()
-        self.status_var.set("Showing all passwords")
+        self.category_explorer.clear_selection()
+        self.password_list.filter_var.set("")
+        self.on_category_selected(None)
     
     def show_add_dialog(self):
         """Show add password dialog"""
         dialog = AddPasswordDialog(self.root, self.pm, self.on_password_saved)
         dialog.show()
     
+    def show_import_dialog(self):
+        """Toon import dialoog"""
+        # The list is reloaded by the PASSWORDS_RELOADED change event
+        dialog = ImportDialog(self.root, self.pm, lambda: self.status_var.set("Import finished"), self.executor)
+        dialog.show()
+    
+    def show_export_dialog(self):
+        """Toon export dialoog"""
+        dialog = ExportDialog(self.root, self.pm, self.executor)
+        dialog.show()
+    
     def show_settings(self):
         """Show settings dialog"""
         messagebox.showinfo("Settings", "Settings functionality will be implemented in future version")
         self.status_var.set("Settings dialog opened")
     
+    def with_password(self, password_id, callback, action):
+        """Load a password on a worker thread and pass it to callback"""
+        def loaded(password):
+            if password:
+                callback(password)
+            else:
+                messagebox.showerror("Error", "Password not found")
+        
+        # A cached entry is only used when it matches the listed version
+        record = self.password_list.get_record(password_id) if self.password_list else None
+        updated_at = record.get('updated_at') if record else None
+        self.executor.submit(
+            self.pm.get_password_by_id, password_id, updated_at,
+            on_success=loaded,
+            on_error=lambda e: messagebox.showerror("Error", f"Could not {action}: {str(e)}")
+        )
+    
     def view_password(self, password_id):
         """View password details"""
-        try:
-            password = self.pm.get_password_by_id(password_id)
-            if password:
-                details = f"""
+        def show(password):
+            details = f"""
 Title: {password['title']}
 Username: {password['username'] or 'N/A'}
-Password: {password['password']}
+Password: {password['password'] if password['decrypt_error'] is None else '(cannot decrypt)'}
 Website: {password['website'] or 'N/A'}
 Category: {password['category'] or 'Uncategorized'}
 Notes: {password['notes'] or 'N/A'}
-                """.strip()
-                
-                messagebox.showinfo("Password Details", details)
-                self.status_var.set(f"Viewed password: {password['title']}")
-            else:
-                messagebox.showerror("Error", "Password not found")
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not view password: {str(e)}")
+            """.strip()
+            
+            messagebox.showinfo("Password Details", details)
+            self.status_var.set(f"Viewed password: {password['title']}")
+        
+        self.with_password(password_id, show, "view password")
     
     def edit_password(self, password_id):
         """Edit password"""
@@ -316,35 +479,32 @@ Notes: {password['notes'] or 'N/A'}
     
     def copy_password(self, password_id):
         """Copy password to clipboard"""
-        try:
-            password = self.pm.get_password_by_id(password_id)
-            if password:
-                self.root.clipboard_clear()
-                self.root.clipboard_append(password['password'])
-                self.status_var.set("Password copied to clipboard")
-            else:
-                messagebox.showerror("Error", "Password not found")
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not copy password: {str(e)}")
+        def copy(password):
+            if password['decrypt_error'] is not None:
+                messagebox.showerror("Error", f"Cannot decrypt password: {password['decrypt_error']}")
+                return
+            self.root.clipboard_clear()
+            self.root.clipboard_append(password['password'])
+            self.status_var.set("Password copied to clipboard")
+        
+        self.with_password(password_id, copy, "copy password")
     
     def copy_username(self, password_id):
         """Copy username to clipboard"""
-        try:
-            password = self.pm.get_password_by_id(password_id)
-            if password and password['username']:
+        def copy(password):
+            if password['username']:
                 self.root.clipboard_clear()
                 self.root.clipboard_append(password['username'])
                 self.status_var.set("Username copied to clipboard")
             else:
                 messagebox.showwarning("Warning", "No username available to copy")
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not copy username: {str(e)}")
+        
+        self.with_password(password_id, copy, "copy username")
     
     def open_website(self, password_id):
         """Open website in browser"""
-        try:
-            password = self.pm.get_password_by_id(password_id)
-            if password and password['website']:
+        def open_url(password):
+            if password['website']:
                 import webbrowser
                 url = password['website']
                 if not url.startswith(('http://', 'https://')):
@@ -353,36 +513,121 @@ Notes: {password['notes'] or 'N/A'}
                 self.status_var.set("Website opened in browser")
             else:
                 messagebox.showwarning("Warning", "No website URL available")
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not open website: {str(e)}")
+        
+        self.with_password(password_id, open_url, "open website")
     
     def delete_password(self, password_id):
         """Delete password"""
-        try:
-            password = self.pm.get_password_by_id(password_id)
-            if password:
-                if messagebox.askyesno("Confirm Delete", 
-                                     f"Are you sure you want to delete '{password['title']}'?"):
-                    if self.pm.delete_password(password_id):
-                        self.refresh_ui()
-                        self.status_var.set("Password deleted successfully")
-                    else:
-                        messagebox.showerror("Error", "Failed to delete password")
+        def deleted(success):
+            if success:
+                self.status_var.set("Password deleted successfully")
             else:
-                messagebox.showerror("Error", "Password not found")
-        except Exception as e:
-            messagebox.showerror("Error", f"Could not delete password: {str(e)}")
+                messagebox.showerror("Error", "Failed to delete password")
+        
+        def confirm(password):
+            if messagebox.askyesno("Confirm Delete", 
+                                 f"Are you sure you want to delete '{password['title']}'?"):
+                self.executor.submit(
+                    self.pm.delete_password, password_id,
+                    on_success=deleted,
+                    on_error=lambda e: messagebox.showerror("Error", f"Could not delete password: {str(e)}")
+                )
+        
+        self.with_password(password_id, confirm, "delete password")
+    
+    def on_user_activity(self, event=None):
+        """Remember the time of the last user input"""
+        self.last_activity = time.monotonic()
+    
+    def lock_timeout_seconds(self):
+        """Idle time before the vault locks, or None when auto-lock is off"""
+        if not self.settings_manager.get('auto_lock', True):
+            return None
+        try:
+            minutes = float(self.settings_manager.get('lock_timeout', 5))
+        except (TypeError, ValueError):
+            minutes = 5
+        return max(minutes, 0.5) * 60
+    
+    def start_auto_lock(self):
+        """(Re)start the inactivity timer for an unlocked vault"""
+        self.stop_auto_lock()
+        self.last_activity = time.monotonic()
+        self.schedule_auto_lock()
+    
+    def schedule_auto_lock(self):
+        """Schedule the single lock check for when the idle time could run out"""
+        timeout = self.lock_timeout_seconds()
+        if timeout is None:
+            # Check again later in case auto-lock gets switched on
+            delay = 60
+        else:
+            delay = timeout - (time.monotonic() - self.last_activity)
+        self.lock_job = self.root.after(max(int(delay * 1000), 100), self.check_auto_lock)
+    
+    def stop_auto_lock(self):
+        """Cancel the inactivity timer"""
+        if self.lock_job is not None:
+            self.root.after_cancel(self.lock_job)
+            self.lock_job = None
+    
+    def check_auto_lock(self):
+        """Lock when the user has been idle long enough, otherwise re-arm"""
+        self.lock_job = None
+        if self.pm is None:
+            return
+        
+        timeout = self.lock_timeout_seconds()
+        if timeout is not None and time.monotonic() - self.last_activity >= timeout:
+            self.lock_vault()
+        else:
+            self.schedule_auto_lock()
+    
+    def lock_vault(self):
+        """Lock the vault: drop keys, caches, connections and loaded rows"""
+        self.stop_auto_lock()
+        self.executor.cancel_all()
+        self.refresh_task = None
+        self.category_task = None
+        
+        if self.password_list is not None:
+            self.password_list.clear()
+            self.password_list = None
+        for widget in self.root.winfo_children():
+            widget.destroy()
+        self.busy_bar = None
+        
+        # The change subscription stays; the same vault is unlocked again
+        self.pm.lock()
+        self.root.title("SavePassword - Locked")
+        self.show_login_dialog()
+    
+    def on_close(self):
+        """Stop background work and close the vault before the window goes away"""
+        self.stop_auto_lock()
+        self.executor.shutdown()
+        if self.pm is not None:
+            self.pm.changes.unsubscribe(self.on_vault_change_threadsafe)
+            # Closes the pooled connections and drops the key
+            self.pm.lock()
+            self.pm = None
+        self.root.destroy()
     
     def switch_database(self):
         """Switch to different database"""
         if messagebox.askyesno("Switch Database", 
                              "Are you sure you want to switch databases?\nCurrent data will be saved."):
+            self.stop_auto_lock()
+            self.executor.cancel_all()
             for widget in self.root.winfo_children():
                 widget.destroy()
+            self.busy_bar = None
+            self.password_list = None
+            self.pm.changes.unsubscribe(self.on_vault_change_threadsafe)
+            self.pm.lock()
             self.pm = None
             self.show_database_selection()
     
     def on_password_saved(self):
-        """Callback wanneer wachtwoord is opgeslagen"""
-        self.refresh_ui()
+        """Callback wanneer wachtwoord is opgeslagen (de lijst volgt via change events)"""
         self.status_var.set("Password saved successfully")
\ No newline at end of file
@@ -0,0 +1,148 @@
+"""
+Background task execution for the Tk GUI
+"""
+
+import queue
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+class TaskCancelled(Exception):
+    """Raised inside a task that has been cancelled"""
+
+class Task:
+    """Handle for a task submitted to the TaskExecutor"""
+    
+    def __init__(self, executor, on_success=None, on_error=None, on_progress=None):
+        self.executor = executor
+        self.on_success = on_success
+        self.on_error = on_error
+        self.on_progress = on_progress
+        self.future = None
+        self._cancel_event = threading.Event()
+    
+    @property
+    def cancelled(self):
+        """True once cancel() has been called"""
+        return self._cancel_event.is_set()
+    
+    def cancel(self):
+        """Cancel the task; a result that still arrives is dropped"""
+        self._cancel_event.set()
+        if self.future is not None:
+            self.future.cancel()
+    
+    def report_progress(self, done, total=None):
+        """Report progress from the worker thread
+        
+        Raises TaskCancelled when the task was cancelled, which stops long
+        running work at the next progress report.
+        """
+        if self.cancelled:
+            raise TaskCancelled()
+        if self.on_progress is not None:
+            self.executor.call_soon(self.on_progress, done, total)
+
+class TaskExecutor:
+    """Run work on a thread pool and deliver results on the Tk thread
+    
+    Worker threads never touch Tk. Results, errors and progress reports
+    are queued and picked up by a poll loop that runs via ``root.after``.
+    """
+    
+    POLL_MS = 30
+    
+    def __init__(self, root, max_workers=2, busy_callback=None):
+        self.root = root
+        self.busy_callback = busy_callback
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="savepassword")
+        self._pending = queue.SimpleQueue()
+        self._tasks = set()
+        self._poll_job = self.root.after(self.POLL_MS, self._poll)
+    
+    @property
+    def busy(self):
+        """True while any task is running or queued"""
+        return bool(self._tasks)
+    
+    def call_soon(self, func, *args):
+        """Schedule func(*args) on the Tk thread (safe from any thread)"""
+        self._pending.put((func, args))
+    
+    def submit(self, func, *args, on_success=None, on_error=None, on_progress=None, **kwargs):
+        """Run func(*args, **kwargs) on a worker thread
+        
+        on_success(result) and on_error(exception) are called on the Tk
+        thread. When on_progress is given, func receives a
+        ``progress_callback(done, total)`` keyword argument.
+        """
+        task = Task(self, on_success, on_error, on_progress)
+        if on_progress is not None:
+            kwargs['progress_callback'] = task.report_progress
+        
+        def run():
+            if task.cancelled:
+                raise TaskCancelled()
+            return func(*args, **kwargs)
+        
+        self._tasks.add(task)
+        if len(self._tasks) == 1:
+            self._notify_busy(True)
+        
+        task.future = self._pool.submit(run)
+        task.future.add_done_callback(lambda future: self.call_soon(self._finish, task, future))
+        return task
+    
+    def cancel_all(self):
+        """Cancel all running and queued tasks"""
+        for task in list(self._tasks):
+            task.cancel()
+    
+    def _finish(self, task, future):
+        """Deliver the outcome of a task (Tk thread)"""
+        self._tasks.discard(task)
+        if not self._tasks:
+            self._notify_busy(False)
+        
+        if task.cancelled or future.cancelled():
+            return
+        
+        error = future.exception()
+        if isinstance(error, TaskCancelled):
+            return
+        if error is not None:
+            if task.on_error is not None:
+                task.on_error(error)
+            else:
+                print(f"Background task failed: {error}")
+        elif task.on_success is not None:
+            task.on_success(future.result())
+    
+    def _notify_busy(self, busy):
+        """Tell the GUI that the executor became busy or idle"""
+        if self.busy_callback is not None:
+            self.busy_callback(busy)
+    
+    def _poll(self):
+        """Run callbacks queued by worker threads"""
+        while True:
+            try:
+                func, args = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            try:
+                func(*args)
+            except Exception as e:
+                print(f"Error in task callback: {e}")
+        self._poll_job = self.root.after(self.POLL_MS, self._poll)
+    
+    def shutdown(self):
+        """Cancel outstanding work and stop the worker threads
+        
+        Queued tasks are dropped; running ones stop at their next progress
+        report (or when their next query fails after the vault is closed).
+        """
+        self.cancel_all()
+        if self._poll_job is not None:
+            self.root.after_cancel(self._poll_job)
+            self._poll_job = None
+        self._pool.shutdown(wait=False, cancel_futures=True)
\ No newline at end of file
@@ -0,0 +1,107 @@
+"""
+EXPLAIN QUERY PLAN checks for the list, count, host and statistics queries
+
+Each test runs a PasswordManager method against an in-memory database,
+records the SQL it executes (with bound parameters) and checks the plans
+SQLite picks for it.
+"""
+
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from core.kdf import new_kdf_params
+from core.password_manager import PasswordManager
+
+class QueryPlanTest(unittest.TestCase):
+    """Check that vault queries use their indexes"""
+    
+    def setUp(self):
+        self.pm = PasswordManager(':memory:')
+        self.pm.set_master_password('test', new_kdf_params('pbkdf2-sha256', iterations=1000))
+        self.pm.add_category('Work')
+        self.work = self.category_id('Work')
+        self.pm.add_category('Clients', self.work)
+        self.clients = self.category_id('Clients')
+        self.pm.add_category('Home')
+        self.home = self.category_id('Home')
+        for index in range(20):
+            category_id = (self.work, self.clients, self.home, None)[index % 4]
+            self.pm.add_password(f"Entry {index}", "user", "secret",
+                                 f"https://www.site{index % 5}.example/login", "", category_id)
+    
+    def tearDown(self):
+        self.pm.close()
+    
+    def category_id(self, name):
+        """Id of a category created in setUp"""
+        return next(c['id'] for c in self.pm.get_all_categories_flat() if c['name'] == name)
+    
+    def plans(self, method, *args):
+        """Run a method and return (sql, plan details) for its SELECTs on passwords"""
+        statements = []
+        with self.pm.db.connection() as conn:
+            conn.set_trace_callback(statements.append)
+            try:
+                method(*args)
+            finally:
+                conn.set_trace_callback(None)
+            
+            plans = []
+            for sql in statements:
+                if sql.lstrip().upper().startswith('SELECT') and 'passwords' in sql:
+                    cursor = conn.execute(f"EXPLAIN QUERY PLAN {sql}")
+                    plans.append((sql, [row[3] for row in cursor.fetchall()]))
+        self.assertTrue(plans, "no query on passwords was executed")
+        return plans
+    
+    def assert_plan(self, plans, uses=None, forbidden=('USE TEMP B-TREE',)):
+        """Every plan uses the ``uses`` index and contains none of ``forbidden``"""
+        for sql, details in plans:
+            text = '\n'.join(details)
+            if uses is not None:
+                self.assertIn(uses, text, sql)
+            for step in forbidden:
+                self.assertNotIn(step, text, sql)
+            for detail in details:
+                # A bare "SCAN p" is a full table scan without an index
+                self.assertFalse(detail.startswith('SCAN p') and 'INDEX' not in detail, sql)
+    
+    def test_first_page_walks_title_index(self):
+        self.assert_plan(self.plans(self.pm.get_passwords_page, None, 10), 'idx_passwords_title')
+    
+    def test_keyset_page_seeks_title_index(self):
+        page = self.pm.get_passwords_page(None, 5)
+        plans = self.plans(self.pm.get_passwords_page, page['next_cursor'], 5)
+        self.assert_plan(plans, 'idx_passwords_title (title>?)')
+    
+    def test_category_page_uses_category_title_index(self):
+        plans = self.plans(self.pm.get_passwords_page, None, 10, self.home)
+        self.assert_plan(plans, 'idx_passwords_category_title (category_id=?)')
+    
+    def test_subtree_page_seeks_each_category(self):
+        # Several index ranges cannot be merged in title order; only the sort is allowed
+        plans = self.plans(self.pm.get_passwords_page, None, 10, self.work)
+        self.assert_plan(plans, 'idx_passwords_category_title (category_id=?)', forbidden=())
+    
+    def test_count_passwords_uses_covering_index(self):
+        self.assert_plan(self.plans(self.pm.count_passwords), 'COVERING INDEX')
+        self.assert_plan(self.plans(self.pm.count_passwords, self.work), 'COVERING INDEX')
+    
+    def test_find_by_website_uses_host_index(self):
+        plans = self.plans(self.pm.find_by_website, "https://site1.example")
+        self.assert_plan(plans, 'idx_passwords_website_host (website_host=?)')
+    
+    def test_stats_use_updated_at_index(self):
+        plans = [
+            (sql, details) for sql, details in self.plans(self.pm.get_stats)
+            if 'updated_at' in sql
+        ]
+        self.assertTrue(plans)
+        self.assert_plan(plans, 'idx_passwords_updated_at (updated_at>?)')
+        self.assert_plan(plans, 'idx_passwords_updated_at (updated_at<?)')
+
+if __name__ == '__main__':
+    unittest.main()
\ No newline at end of file